@@ -1,10 +1,14 @@
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional
 import pygame
 from colors import Color
-from piece import Piece
+from piece import Piece, COLOR_INDEX
+from rules import BISHOP
 
 
 class Bishop(Piece):
+    kind = BISHOP
+    __slots__ = ()
+
     def __init__(self, parent_surface: pygame.Surface, pos: Tuple[int, int], color: Color, texture_path: Optional[str] = None):
         """
         Класс слона (bishop)
@@ -18,43 +22,14 @@ class Bishop(Piece):
             texture_path = f"assets/bB.png" if color == Color.BLACK else f"assets/wB.png"
         super().__init__(parent_surface, pos, color, texture_path)
 
-    def is_valid_move(self, new_position: Tuple[int, int], pieces: List[Piece], ignore_checks: bool = False) -> bool:
+    def targets(self, position) -> int:
         """
-        Проверяет допустимость хода для слона:
+        Ходы слона по битбордам:
         - Движение только по диагоналям
         - Не может перепрыгивать через фигуры
         - Может брать фигуры противника
         """
-        # Сначала базовая проверка (нельзя бить свои фигуры)
-        if not super().is_valid_move(new_position, pieces):
-            return False
-
-        dx = new_position[0] - self.position[0]
-        dy = new_position[1] - self.position[1]
-
-        # Проверка на диагональное перемещение (|dx| == |dy|)
-        if abs(dx) != abs(dy):
-            return False
-
-        step_x = 1 if dx > 0 else -1
-        step_y = 1 if dy > 0 else -1
-        current_x, current_y = self.position[0] + \
-            step_x, self.position[1] + step_y
-
-        # Проверяем все клетки по пути
-        while (current_x != new_position[0]) and (current_y != new_position[1]):
-            for piece in pieces:
-                if piece.position == (current_x, current_y):
-                    return False  # Препятствие на пути
-            current_x += step_x
-            current_y += step_y
-
-        # Проверка конечной клетки: либо пуста, либо с вражеской фигурой
-        for piece in pieces:
-            if piece.position == new_position:
-                return piece.color != self.color  # Разрешено, если чужая фигура
-
-        return True  # Клетка свободна
+        return position.bishop_targets(self.square, COLOR_INDEX[self.color])
 
     def is_dark_square(self) -> bool:
         """
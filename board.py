@@ -1,46 +1,94 @@
+import io
+import math
 import pygame
 from typing import List, Tuple
 from colors import Color
 from constants import *
 from pawn import Pawn
-from piece import Piece
+from piece import Piece, COLOR_INDEX
 from rook import Rook
 from knight import Knight
 from bishop import Bishop
 from queen import Queen
 from king import King
+from fonts import get_font, render_text
+from rules.pgn import export_pgn, read_games, replay
+from rules.search import SearchThread
+from rules.evaluation import evaluate
+from rules import (Position, WHITE, WHITE_KINGSIDE, WHITE_QUEENSIDE,
+                      BLACK_KINGSIDE, BLACK_QUEENSIDE, CAPTURE, CASTLING, CASTLING_ROOK,
+                      DOUBLE_PUSH, EN_PASSANT, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                      iter_bits, move_from, move_to, move_promotion, move_flags,
+                      square_index, square_pos,
+                      CHECKMATE, STALEMATE, FIFTY_MOVES, THREEFOLD_REPETITION,
+                      FIVEFOLD_REPETITION, KINGS_ONLY, LONE_KNIGHT, LONE_BISHOP,
+                      SAME_COLOR_BISHOPS, game_status, material_draw, parse_fen, to_fen,
+                      START_FEN, move_to_san)
+
+# Тексты для ничейных исходов из rules.result
+DRAW_REASONS = {
+    KINGS_ONLY: "Ничья: остались только короли.",
+    LONE_KNIGHT: "Ничья: только короли и один конь — мат невозможен.",
+    LONE_BISHOP: "Ничья: только короли и один слон — мат невозможен.",
+    SAME_COLOR_BISHOPS: "Ничья: только короли и однопольные слоны — мат невозможен.",
+    FIFTY_MOVES: "Ничья по правилу 50 ходов",
+    THREEFOLD_REPETITION: "Ничья: троекратное повторение позиции.",
+    FIVEFOLD_REPETITION: "Ничья: позиция повторилась пять раз.",
+    STALEMATE: "Пат — ничья.",
+}
+
+# Классы фигур по типу из rules
+PIECE_CLASSES = {PAWN: Pawn, KNIGHT: Knight, BISHOP: Bishop, ROOK: Rook, QUEEN: Queen, KING: King}
+# Классы фигур, в которые превращается пешка
+PROMOTION_CLASSES = {KNIGHT: Knight, BISHOP: Bishop, ROOK: Rook, QUEEN: Queen}
 
 
 class Board:
-    def __init__(self):
+    def __init__(self, engine_color=None, engine_time=1.0):
+        """
+        :param engine_color: Цвет, за который играет движок (None — игра двух людей)
+        :param engine_time: Время на ход движка в секундах
+        """
         pygame.init()
         self.screen = pygame.display.set_mode(
             (COLS * TILE_SIZE + 300, ROWS * TILE_SIZE+80))
         pygame.display.set_caption("Шахматы")
 
         self.pieces = []
+        self.squares = [None] * 64  # Клетка 0–63 -> фигура на ней или None
         self.current_turn = Color.WHITE
         self.selected_piece = None
         self.show_selection = False
         self.last_double_step_pawn = None
         self.promotion_pawn = None
+        self.promotion_move = None  # Ход пешки, ожидающий выбора фигуры
         self.halfmove_clock = 0
         self.is_game_over = False
         self.move_list = []
         self.promotion_options = []  # Для хранения вариантов превращения
+        self.undo_stack = []  # Данные для отмены ходов, сделанных через make_move
+        self.status_cache = {}  # Статус партии по ключу позиции
+        self.legal_moves_key = None  # Хеш позиции, для которой построен legal_moves_by_square
+        self.legal_moves_by_square = {}  # Клетка -> легальные ходы фигуры с неё
+        self.repetitions = {}  # Zobrist-хеш позиции -> сколько раз она встречалась
+        self.start_fen = START_FEN  # Позиция, с которой началась партия (для PGN)
 
         self.selection_rect = pygame.Surface(
             (TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
         self.selection_rect.fill((0, 128, 255, 80))
 
-        self.font = pygame.font.SysFont('Arial', 16)
+        # Подсказки ходов выбранной фигуры рисуются готовыми полупрозрачными поверхностями
+        self.hint_overlays = self.create_hint_overlays()
+        self.move_hints = {}  # Клетка назначения -> поверхность подсказки
+
+        self.font = get_font('Arial', 16)
         self.turn_label = self.create_label(
             "Ход: белые", (COLS * TILE_SIZE + 20, 20))
 
         # Параметры для истории ходов с полосой прокрутки
         self.move_history_rect = pygame.Rect(
             COLS * TILE_SIZE + 10, 50, 280, ROWS * TILE_SIZE - 60)
-        self.move_history_font = pygame.font.SysFont('Arial', 14)
+        self.move_history_font = get_font('Arial', 14)
         self.move_history_surface = pygame.Surface(
             (280, ROWS * TILE_SIZE - 60))
         self.scroll_y = 0  # Текущая позиция прокрутки
@@ -51,6 +99,31 @@ class Board:
         self.scroll_dragging = False  # Флаг перетаскивания бегунка
         self.scroll_start_y = 0  # Начальная позиция при перетаскивании
         self.content_height = 0  # Общая высота содержимого
+        self.history_rows = []  # Отрисованные строки истории ходов
+
+        # Полоса оценки справа от истории ходов; оценка считается раз на позицию
+        self.eval_bar_rect = pygame.Rect(
+            COLS * TILE_SIZE + 292, 50, 6, ROWS * TILE_SIZE - 60)
+        self.eval_key = None  # Хеш позиции, для которой посчитана eval_score
+        self.eval_score = 0  # Оценка в сантипешках с точки зрения белых
+
+        # Битбордовое представление позиции для проверки ходов
+        self.position = Position()
+
+        # Движок думает в отдельном потоке, игровой цикл только опрашивает результат
+        self.engine_color = engine_color
+        self.engine_time = engine_time
+        # Таблица транспозиций занимает память, поэтому без движка поток не создаётся
+        self.engine = SearchThread() if engine_color is not None else None
+        self.engine_label = None  # Глубина, оценка и скорость последнего поиска
+
+        # Что было нарисовано в прошлый раз (для перерисовки только изменений)
+        self.needs_full_redraw = True
+        self.drawn_squares = None
+        self.drawn_selection = None
+        self.drawn_hints = {}
+        self.drawn_panel = None
+        self.drawn_overlay = None
 
         self.create_board()
         self.add_pieces()
@@ -62,6 +135,14 @@ class Board:
                 color = LIGHT_COLOR if (row + col) % 2 == 0 else DARK_COLOR
                 self.tiles.append((row, col, color))
 
+        # Фон (белое поле и клетки доски) рисуется один раз
+        self.background = pygame.Surface(self.screen.get_size())
+        self.background.fill((255, 255, 255))
+        for row, col, color in self.tiles:
+            pygame.draw.rect(self.background, color, (col * TILE_SIZE,
+                             row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
+        self.needs_full_redraw = True
+
     def add_pieces(self):
         self.pieces.clear()
 
@@ -93,46 +174,188 @@ class Board:
             piece.parent_board = self
             self.pieces.append(piece)
 
+        self.sync_position()
+
+    def sync_position(self):
+        """Пересобирает битборды и массив клеток из списка фигур и состояния партии"""
+        position = self.position
+        position.clear()
+        self.squares = [None] * 64
+        for piece in self.pieces:
+            position.put(piece.square, COLOR_INDEX[piece.color], piece.kind)
+            self.squares[piece.square] = piece
+
+        position.side = COLOR_INDEX[self.current_turn]
+        position.castling = self.get_castling_rights()
+        position.halfmove_clock = self.halfmove_clock
+
+        # Взятие на проходе возможно только сразу после двойного хода соперника
+        pawn = self.last_double_step_pawn
+        if pawn and pawn in self.pieces and pawn.color != self.current_turn:
+            direction = -1 if pawn.color == Color.WHITE else 1
+            position.ep_square = square_index(
+                (pawn.position[0], pawn.position[1] - direction))
+
+        position.refresh_hash()
+        self.invalidate_legal_moves()
+        # Предыдущие позиции неизвестны — таблица повторений начинается заново
+        self.repetitions = {position.hash: 1}
+
+    def get_castling_rights(self) -> int:
+        """Права на рокировку по флагам has_moved короля и ладей"""
+        rights = 0
+        corners = [(Color.WHITE, 7, WHITE_KINGSIDE, WHITE_QUEENSIDE),
+                   (Color.BLACK, 0, BLACK_KINGSIDE, BLACK_QUEENSIDE)]
+        for color, row, kingside, queenside in corners:
+            king = self.piece_at((4, row))
+            if not isinstance(king, King) or king.color != color or king.has_moved:
+                continue
+            for x, right in ((7, kingside), (0, queenside)):
+                rook = self.piece_at((x, row))
+                if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+                    rights |= right
+        return rights
+
+    def create_hint_overlays(self):
+        """Поверхности подсказок: тихий ход, взятие и рокировка"""
+        color = HIGHLIGHT_COLOR[:3] + (110,)
+        center = (TILE_SIZE // 2, TILE_SIZE // 2)
+
+        quiet = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(quiet, color, center, TILE_SIZE // 6)
+
+        capture = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(capture, color, center, TILE_SIZE // 2 - 2, 5)
+
+        castling = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
+        pygame.draw.rect(castling, color, castling.get_rect().inflate(-6, -6), 4,
+                         border_radius=8)
+        pygame.draw.circle(castling, color, center, TILE_SIZE // 6)
+
+        return {"quiet": quiet, "capture": capture, "castling": castling}
+
+    def get_move_hints(self, piece):
+        """Подсказки для клеток, куда фигура может пойти (из кэша легальных ходов)"""
+        overlays = self.hint_overlays
+        hints = {}
+        for move in self.get_legal_move_map().get(piece.square, ()):
+            flags = move_flags(move)
+            if flags & CASTLING:
+                kind = "castling"
+            elif flags & CAPTURE:
+                kind = "capture"
+            else:
+                kind = "quiet"
+            hints[move_to(move)] = overlays[kind]
+        return hints
+
     def get_last_double_step_pawn(self):
         return self.last_double_step_pawn
 
     def create_label(self, text, pos):
-        label = self.font.render(text, True, (0, 0, 0))
+        label = render_text(self.font, text, (0, 0, 0))
         return (label, pos)
 
     def draw(self):
-        self.screen.fill((255, 255, 255))
-
-        # Рисуем клетки доски
-        for row, col, color in self.tiles:
-            pygame.draw.rect(self.screen, color, (col * TILE_SIZE,
-                             row * TILE_SIZE, TILE_SIZE, TILE_SIZE))
-
-        # Рисуем фигуры
-        for piece in self.pieces:
-            piece.draw()
-
-        # Рисуем выделение выбранной фигуры
+        """
+        Перерисовывает только изменившиеся области экрана
+
+        Изменения находятся сравнением с тем, что было нарисовано в прошлый раз:
+        расстановка фигур, выделение, состояние панели и оверлеев
+        """
+        dirty_rects = []
+        overlay_state = (self.promotion_pawn is not None, self.is_game_over)
+        full = self.needs_full_redraw or overlay_state != self.drawn_overlay
+
+        squares = list(self.position.board)
+        selection = None
+        hints = {}
         if self.show_selection and self.selected_piece:
-            x = self.selected_piece.position[0] * TILE_SIZE
-            y = self.selected_piece.position[1] * TILE_SIZE
-            self.screen.blit(self.selection_rect, (x, y))
+            selection = self.selected_piece.square
+            hints = self.move_hints
+
+        if full:
+            self.screen.blit(self.background, (0, 0))
+            dirty_squares = range(64)
+        elif overlay_state != (False, False):
+            # Под открытым оверлеем доска не меняется
+            dirty_squares = []
+        else:
+            drawn = self.drawn_squares
+            dirty_squares = {sq for sq in range(64) if squares[sq] != drawn[sq]}
+            if selection != self.drawn_selection:
+                dirty_squares.update(sq for sq in (selection, self.drawn_selection)
+                                     if sq is not None)
+            if hints is not self.drawn_hints:
+                dirty_squares.update(hints)
+                dirty_squares.update(self.drawn_hints)
+
+        # Рисуем клетки доски и фигуры на изменившихся клетках
+        if dirty_squares:
+            squares_map = self.squares
+            for sq in dirty_squares:
+                x, y = square_pos(sq)
+                rect = pygame.Rect(x * TILE_SIZE, y * TILE_SIZE, TILE_SIZE, TILE_SIZE)
+                if not full:
+                    self.screen.blit(self.background, rect, rect)
+                    dirty_rects.append(rect)
+                piece = squares_map[sq]
+                if piece:
+                    piece.draw()
+                # Рисуем выделение выбранной фигуры
+                if sq == selection:
+                    self.screen.blit(self.selection_rect, rect)
+                # Подсказка хода поверх фигуры (кольцо взятия её не закрывает)
+                hint = hints.get(sq)
+                if hint:
+                    self.screen.blit(hint, rect)
 
         # Рисуем меню превращения
-        if self.promotion_pawn:
+        if full and self.promotion_pawn:
             self.draw_promotion_menu()
 
+        # Панель справа: метка хода, история ходов, кнопка "Сдаться"
+        panel_state = (self.current_turn, len(self.move_list),
+                       self.move_list[-1] if self.move_list else None,
+                       self.scroll_y, self.is_game_over, self.engine_label,
+                       self.get_evaluation())
+        if full or panel_state != self.drawn_panel:
+            panel_rect = pygame.Rect(COLS * TILE_SIZE, 0,
+                                     self.screen.get_width() - COLS * TILE_SIZE,
+                                     self.screen.get_height())
+            if not full:
+                self.screen.blit(self.background, panel_rect, panel_rect)
+                dirty_rects.append(panel_rect)
+            self.draw_panel()
+            self.drawn_panel = panel_state
+
+        # Рисуем результат игры, если игра завершена
+        if full and self.is_game_over and hasattr(self, 'game_result'):
+            self.draw_game_result()
+
+        self.drawn_squares = squares
+        self.drawn_selection = selection
+        self.drawn_hints = hints
+        self.drawn_overlay = overlay_state
+        self.needs_full_redraw = False
+
+        if full:
+            pygame.display.flip()
+        elif dirty_rects:
+            pygame.display.update(dirty_rects)
+
+    def draw_panel(self):
+        """Отрисовка правой панели поверх фона"""
         # Рисуем метку текущего хода
         self.screen.blit(self.turn_label[0], self.turn_label[1])
+        if self.engine_label:
+            self.screen.blit(self.engine_label[0], self.engine_label[1])
 
         # Рисуем историю ходов
         self.draw_move_history()
 
-        # Рисуем результат игры, если игра завершена
-        if self.is_game_over and hasattr(self, 'game_result'):
-            self.draw_game_result()
-        else:
-           # Кнопка "Сдаться", если игра не окончена
+        if not self.is_game_over:
+            # Кнопка "Сдаться", если игра не окончена
             button_width, button_height = 200, 40
             button_x = COLS * TILE_SIZE + 50
             # ставим под историей ходов, отталкиваясь от низа панели
@@ -145,16 +368,14 @@ class Board:
             pygame.draw.rect(self.screen, (0, 0, 0),
                              self.resign_button, 2, border_radius=5)
 
-            button_font = pygame.font.SysFont('Arial', 22, bold=True)
-            button_text = button_font.render("Сдаться", True, (0, 0, 0))
+            button_font = get_font('Arial', 22, bold=True)
+            button_text = render_text(button_font, "Сдаться", (0, 0, 0))
             self.screen.blit(
                 button_text,
                 (button_x + (button_width - button_text.get_width()) // 2,
                  button_y + (button_height - button_text.get_height()) // 2)
             )
 
-        pygame.display.flip()
-
     def draw_promotion_menu(self):
         if not self.promotion_pawn:
             return
@@ -177,84 +398,39 @@ class Board:
         pygame.draw.rect(self.screen, (181, 136, 99),
                          (panel_x, panel_y, panel_width, panel_height), 2)
 
-        # Варианты превращения
-        choices = [Queen, Rook, Bishop, Knight]
-        self.promotion_options = []
-
-        for i, piece_cls in enumerate(choices):
-            x = panel_x + i * TILE_SIZE
-            piece = piece_cls(self.screen, (0, 0), self.promotion_pawn.color)
-            piece.parent_board = self
+        # Варианты превращения создаются один раз на каждое превращение
+        if not self.promotion_options:
+            choices = [Queen, Rook, Bishop, Knight]
+            for i, piece_cls in enumerate(choices):
+                x = panel_x + i * TILE_SIZE
+                piece = piece_cls(self.screen, (0, 0), self.promotion_pawn.color)
+                piece.parent_board = self
+                # Сохраняем прямоугольники для обработки кликов
+                self.promotion_options.append(
+                    (piece, pygame.Rect(x, panel_y, TILE_SIZE, TILE_SIZE)))
 
+        for piece, rect in self.promotion_options:
             # Рисуем фигуру
             if piece.sprite:
-                self.screen.blit(piece.sprite, (x, panel_y))
+                self.screen.blit(piece.sprite, rect.topleft)
             else:
                 # Fallback если нет спрайта
                 color = (255, 255, 255) if piece.color == Color.WHITE else (
                     0, 0, 0)
-                pygame.draw.rect(self.screen, color,
-                                 (x, panel_y, TILE_SIZE, TILE_SIZE))
-
-            # Сохраняем прямоугольники для обработки кликов
-            self.promotion_options.append(
-                (piece, pygame.Rect(x, panel_y, TILE_SIZE, TILE_SIZE)))
+                pygame.draw.rect(self.screen, color, rect)
 
     def handle_promotion_choice(self, mouse_pos):
         for piece, rect in self.promotion_options:
             if rect.collidepoint(mouse_pos):
-                # Определяем символ фигуры для превращения
-                prom_letter = ""
-                if isinstance(piece, Queen):
-                    prom_letter = "Q"
-                elif isinstance(piece, Rook):
-                    prom_letter = "R"
-                elif isinstance(piece, Bishop):
-                    prom_letter = "B"
-                elif isinstance(piece, Knight):
-                    prom_letter = "N"
-
-                # Получаем координаты превращения
-                files = "abcdefgh"
-                ranks = "12345678"
-                pos = self.promotion_pawn.position
-                to_file = files[pos[0]]
-                to_rank = ranks[pos[1]]
-
-                # Формируем запись хода
-                move = ""
-                if self.promotion_pawn.captured_piece:  # Превращение с взятием
-                    # Берем исходную позицию пешки ДО хода
-                    from_file = files[self.promotion_pawn.prev_position[0]]
-                    move = f"{from_file}x{to_file}{to_rank}={prom_letter}"
-                else:  # Обычное превращение
-                    move = f"{to_file}{to_rank}={prom_letter}"
-
-                # Добавляем ход в историю
-                if self.current_turn == Color.WHITE:
-                    move_num = len(self.move_list) + 1
-                    self.move_list.append(f"{move_num}. {move}")
-                else:
-                    if self.move_list:
-                        self.move_list[-1] += f" {move}"
-                    else:
-                        self.move_list.append(f"1... {move}")
-
-                # Создаем новую фигуру
-                new_piece = piece.__class__(
-                    self.screen, self.promotion_pawn.position, self.promotion_pawn.color)
-                new_piece.parent_board = self
-
-                # Заменяем пешку
-                self.pieces.remove(self.promotion_pawn)
-                self.pieces.append(new_piece)
+                move = self.promotion_move | (piece.kind << 12)
 
                 # Сбрасываем состояние превращения
                 self.promotion_pawn = None
+                self.promotion_move = None
                 self.promotion_options = []
 
-                # Передаем ход
-                self.switch_turn()
+                # Записываем и выполняем ход с превращением
+                self.play_move(move)
                 return True
         return False
 
@@ -264,6 +440,10 @@ class Board:
             if event.type == pygame.QUIT:
                 return False
 
+            # Окно перекрыли или развернули — нужна полная перерисовка
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED, pygame.WINDOWRESTORED):
+                self.needs_full_redraw = True
+
             # Обработка клика по кнопке Новая игра
             if self.is_game_over and hasattr(self, 'new_game_button'):
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -318,6 +498,10 @@ class Board:
                     self.handle_promotion_choice(pygame.mouse.get_pos())
                 continue
 
+            # Пока ходит движок, доска не реагирует на клики
+            if self.current_turn == self.engine_color:
+                continue
+
             # Обработка клика по доске
             if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 # Игнорируем клики на полосе прокрутки
@@ -326,87 +510,18 @@ class Board:
 
                 mouse_pos = pygame.mouse.get_pos()
                 cell = (mouse_pos[0] // TILE_SIZE, mouse_pos[1] // TILE_SIZE)
+                on_board = 0 <= cell[0] < COLS and 0 <= cell[1] < ROWS
 
                 if self.selected_piece:
-                    # Сначала получаем все легальные ходы для выбранной фигуры
-                    legal_moves = self.get_legal_moves(self.selected_piece)
-
-                    if cell in legal_moves:
-                        prev_pos = self.selected_piece.position
-                        is_capture = False
-                        is_castling = False
-                        is_en_passant = False
-                        captured_piece = None
-                        is_pawn_move = isinstance(self.selected_piece, Pawn)
-
-                        # Взятие на проходе
-                        if isinstance(self.selected_piece, Pawn):
-                            direction = -1 if self.selected_piece.color == Color.WHITE else 1
-                            if (abs(cell[0] - prev_pos[0]) == 1 and
-                                cell[1] - prev_pos[1] == direction and
-                                self.last_double_step_pawn and
-                                    self.last_double_step_pawn.position == (cell[0], prev_pos[1])):
-
-                                captured_piece = self.last_double_step_pawn
-                                self.pieces.remove(self.last_double_step_pawn)
-                                is_en_passant = True
-                                is_capture = True
-                                self.halfmove_clock = 0
-
-                        # Обычное взятие
-                        for p in self.pieces[:]:
-                            if p.position == cell and p.color != self.selected_piece.color:
-                                captured_piece = p
-                                is_capture = True
-                                self.halfmove_clock = 0
-                                break
-
-                        # Проверка на рокировку
-                        if isinstance(self.selected_piece, King) and abs(cell[0] - prev_pos[0]) == 2:
-                            is_castling = True
-                            self.selected_piece.do_castling_move(
-                                cell, self.pieces)
-
-                        # Превращение пешки
-                        if isinstance(self.selected_piece, Pawn):
-                            last_rank = 0 if self.selected_piece.color == Color.WHITE else 7
-                            if cell[1] == last_rank:
-                                self.selected_piece.move_to(cell)
-                                if is_capture and captured_piece in self.pieces:
-                                    self.pieces.remove(captured_piece)
-                                self.promotion_pawn = self.selected_piece
-                                self.promotion_pawn.captured_piece = captured_piece if is_capture else None
-                                self.selected_piece = None
-                                self.show_selection = False
-                                self.halfmove_clock = 0
-                                return True
-
-                        # Добавляем ход в историю
-                        if not (isinstance(self.selected_piece, Pawn) and cell[1] in (0, 7)):
-                            self.add_move_to_history(prev_pos, cell, self.selected_piece,
-                                                     is_capture, is_castling, is_en_passant)
-
-                        # Двигаем фигуру
-                        self.selected_piece.move_to(cell)
-
-                        # Убираем побитую фигуру
-                        if is_capture and captured_piece and captured_piece in self.pieces:
-                            self.pieces.remove(captured_piece)
-
-                        # Обновляем счётчик 50 ходов
-                        if is_capture or is_pawn_move:
-                            self.halfmove_clock = 0
-                        else:
-                            self.halfmove_clock += 1
+                    move = self.find_legal_move(self.selected_piece, cell) if on_board else None
 
-                        # Флаг двойного хода пешки
-                        if isinstance(self.selected_piece, Pawn) and abs(cell[1] - prev_pos[1]) == 2:
-                            self.last_double_step_pawn = self.selected_piece
+                    if move is not None:
+                        if move_promotion(move):
+                            # Превращение пешки: ход выполнится после выбора фигуры
+                            self.promotion_pawn = self.selected_piece
+                            self.promotion_move = move & ~(7 << 12)
                         else:
-                            self.last_double_step_pawn = None
-
-                        if not self.promotion_pawn:
-                            self.switch_turn()
+                            self.play_move(move)
 
                         self.selected_piece = None
                         self.show_selection = False
@@ -414,94 +529,116 @@ class Board:
                         # Кликнули не по легальному ходу
                         self.selected_piece = None
                         self.show_selection = False
-                else:
+                elif on_board:
                     # Выбор фигуры
-                    for piece in self.pieces:
-                        if piece.position == cell and piece.color == self.current_turn:
-                            self.selected_piece = piece
-                            self.show_selection = True
-                            break
-
-        # --- Проверки после хода ---
-        if not self.is_game_over:
-            # Ничья по материалу
-            if self.is_draw_by_material(self.pieces):
-                return True
-            # Правило 50 ходов
-            if self.check_fifty_move_rule():
-                return True
-            # Мат
-            if self.is_checkmate(self.current_turn):
-                return True
-            # Пат (нет ходов, но и шаха нет)
-            if not self.is_in_check(self.current_turn):
-                no_moves = True
-                for piece in self.pieces:
-                    if piece.color == self.current_turn and self.get_legal_moves(piece):
-                        no_moves = False
-                        break
-                if no_moves:
-                    self.set_draw("Пат — ничья.")
-                    return True
+                    piece = self.piece_at(cell)
+                    if piece and piece.color == self.current_turn:
+                        self.selected_piece = piece
+                        self.show_selection = True
+                        # Список ходов строится один раз при выборе, а не на каждом кадре
+                        self.move_hints = self.get_move_hints(piece)
+
+        # --- Проверки после хода (из кэша, пока позиция не изменилась) ---
+        if not self.is_game_over and not self.promotion_pawn:
+            _, outcome, detail = self.get_position_status()
+            if outcome == "draw":
+                self.set_draw(detail)
+            elif outcome == "checkmate":
+                self.set_checkmate(detail)
 
         return True
 
+    def update_engine(self):
+        """Запускает поиск, когда ход за движком, и выполняет найденный ход, когда он готов"""
+        if self.is_game_over or self.current_turn != self.engine_color:
+            return
+        if not self.engine.busy:
+            game_history = [key for key, count in self.repetitions.items() for _ in range(count)]
+            self.engine.start(self.position, self.engine_time, game_history)
+            return
+        result = self.engine.poll()
+        if result is None or result.move is None:
+            return
+        text = f"глубина {result.depth}  {result.score / 100:+.2f}  {result.nps} узл./с"
+        self.engine_label = (render_text(self.move_history_font, text, (0, 0, 0)),
+                             (COLS * TILE_SIZE + 120, 23))
+        self.play_move(result.move)
+
+    def get_position_status(self):
+        """
+        Статус позиции (шах, исход, причина или победитель)
+
+        Считается один раз на позицию; на кадрах без ходов берётся из кэша
+        """
+        key = (self.position.key(), self.halfmove_clock, self.get_repetition_count())
+        status = self.status_cache.get(key)
+        if status is None:
+            status = self.status_cache[key] = self.compute_position_status()
+        return status
+
+    def get_repetition_count(self) -> int:
+        """Сколько раз текущая позиция встречалась в партии"""
+        return self.repetitions.get(self.position.hash, 0)
+
+    def compute_position_status(self):
+        """Проверяет шах, мат, пат и ничейные ситуации для стороны на ходу"""
+        in_check, outcome = game_status(self.position, self.get_repetition_count(),
+                                        bool(self.get_legal_move_map()))
+        if outcome is None:
+            return (in_check, None, "")
+        # Мат
+        if outcome == CHECKMATE:
+            winner = "белые" if self.current_turn == Color.BLACK else "чёрные"
+            return (True, "checkmate", winner)
+        return (in_check, "draw", DRAW_REASONS[outcome])
+
     def switch_turn(self):
         self.current_turn = Color.BLACK if self.current_turn == Color.WHITE else Color.WHITE
+        self.update_turn_label()
+
+    def update_turn_label(self):
         text = "белые" if self.current_turn == Color.WHITE else "чёрные"
         self.turn_label = self.create_label(
             f"Ход: {text}", (COLS * TILE_SIZE + 20, 20))
 
-    def add_move_to_history(self, from_pos, to_pos, piece, is_capture, is_castling=False, is_en_passant=False, promotion=None):
-        files = "abcdefgh"
-        ranks = "12345678"
-
-        piece_letters = {
-            Knight: 'N',
-            Bishop: 'B',
-            Rook: 'R',
-            Queen: 'Q',
-            King: 'K',
-            Pawn: ''
-        }
-
-        piece_letter = piece_letters.get(type(piece), '')
-        from_file = files[from_pos[0]]
-        from_rank = ranks[from_pos[1]]
-        to_file = files[to_pos[0]]
-        to_rank = ranks[to_pos[1]]
-
-        if is_castling:
-            move = "O-O" if to_pos[0] > from_pos[0] else "O-O-O"
-        else:
-            move = ""
-            if isinstance(piece, Pawn):
-                # Для пешки указываем только файл при взятии
-                if is_capture:
-                    move += f"{from_file}x"
-                move += f"{to_file}{to_rank}"
-            else:
-                # Для других фигур
-                if is_capture:
-                    # Указываем только тип фигуры, знак взятия и поле
-                    move += f"{piece_letter}x{to_file}{to_rank}"
-                else:
-                    move += f"{piece_letter}{to_file}{to_rank}"
-
-            if promotion:
-                move += f"={promotion}"
-
-        # Всегда создаем новую запись для хода белых
-        if self.current_turn == Color.WHITE:
-            move_num = len(self.move_list) + 1
-            self.move_list.append(f"{move_num}. {move}")
+    def add_move_to_history(self, move: int):
+        """Записывает ход в историю в нотации SAN (до выполнения хода)"""
+        position = self.position
+        # Ходы позиции уже построены для выбора фигуры — SAN берёт уточнение из них
+        legal_moves = [legal for moves in self.get_legal_move_map().values() for legal in moves]
+        san = move_to_san(position, move, legal_moves)
+        if position.side == WHITE:
+            self.move_list.append(f"{position.fullmove_number}. {san}")
+        elif self.move_list:
+            # Ход чёрных дописывается к записи хода белых
+            self.move_list[-1] += f" {san}"
         else:
-            # Добавляем ход черных к последней записи
-            if self.move_list:
-                self.move_list[-1] += f" {move}"
-            else:
-                # На случай если черные ходят первыми (не должно быть)
-                self.move_list.append(f"1... {move}")
+            # Партия начата из позиции, где первыми ходят чёрные
+            self.move_list.append(f"{position.fullmove_number}... {san}")
+
+    def update_history_rows(self):
+        """Синхронизирует кэш отрисованных строк истории с move_list"""
+        rows = self.history_rows
+        del rows[len(self.move_list):]
+        # Последняя запись дополняется ходом чёрных
+        if rows and rows[-1][0] != self.move_list[len(rows) - 1]:
+            rows.pop()
+        for move in self.move_list[len(rows):]:
+            rows.append(self.render_history_row(move))
+
+    def render_history_row(self, move):
+        """Строка истории: (текст, поверхность хода белых, поверхность хода чёрных)"""
+        white_text = black_text = None
+        parts = move.split(' ')
+        if len(parts) >= 2:
+            # Ход белых
+            white_text = render_text(
+                self.move_history_font, f"{parts[0]} {parts[1]}", (0, 0, 0))
+            # Ход черных (если есть)
+            if len(parts) >= 3:
+                black_text = render_text(
+                    self.move_history_font, parts[2], (0, 0, 0))
+        return (move, white_text, black_text)
 
     def draw_move_history(self):
         """Отрисовка истории ходов с полосой прокрутки и фиксированным заголовком"""
@@ -510,31 +647,26 @@ class Board:
         pygame.draw.rect(self.move_history_surface, (200, 200,
                          200), (0, 0, 280, ROWS * TILE_SIZE - 60), 2)
 
-        # Отрисовка ходов с учетом прокрутки
-        y_offset = 40 - self.scroll_y
-        column_width = 120
-
         # Вычисляем общую высоту содержимого
         self.content_height = 40 + len(self.move_list) * 20
 
-        # Отрисовываем только видимые ходы
-        for move in self.move_list:
-            parts = move.split(' ')
-            if len(parts) >= 2:
-                # Ход белых
-                white_part = f"{parts[0]} {parts[1]}"
-                white_text = self.move_history_font.render(
-                    white_part, True, (0, 0, 0))
-                if 0 <= y_offset < ROWS * TILE_SIZE - 70:  # Проверка видимости
-                    self.move_history_surface.blit(white_text, (10, y_offset))
-
-                # Ход черных (если есть)
-                if len(parts) >= 3:
-                    black_text = self.move_history_font.render(
-                        parts[2], True, (0, 0, 0))
-                    if 0 <= y_offset < ROWS * TILE_SIZE - 70:  # Проверка видимости
-                        self.move_history_surface.blit(
-                            black_text, (10 + column_width, y_offset))
+        # Дорисовываем строки только для новых или изменившихся записей
+        self.update_history_rows()
+
+        # Отрисовываем только строки, попадающие в видимое окно
+        column_width = 120
+        visible_height = ROWS * TILE_SIZE - 70
+        first = max(0, math.ceil((self.scroll_y - 40) / 20))
+        y_offset = 40 - self.scroll_y + first * 20
+        for index in range(first, len(self.history_rows)):
+            if y_offset >= visible_height:
+                break
+            _, white_text, black_text = self.history_rows[index]
+            if white_text:
+                self.move_history_surface.blit(white_text, (10, y_offset))
+            if black_text:
+                self.move_history_surface.blit(
+                    black_text, (10 + column_width, y_offset))
             y_offset += 20
 
         # Отображаем поверхность с историей ходов
@@ -542,8 +674,8 @@ class Board:
                          (COLS * TILE_SIZE + 10, 50))
 
         # Отрисовываем заголовок НАД поверхностью с прокруткой (фиксированная позиция)
-        title = self.move_history_font.render(
-            "История ходов:", True, (0, 0, 0))
+        title = render_text(
+            self.move_history_font, "История ходов:", (0, 0, 0))
         self.screen.blit(title, (COLS * TILE_SIZE + 20, 50))
 
         # Отрисовка полосы прокрутки
@@ -561,60 +693,42 @@ class Board:
             COLS * TILE_SIZE + 280, thumb_position, 10, thumb_height)
         pygame.draw.rect(self.screen, (150, 150, 150), self.scroll_thumb_rect)
 
-    def is_draw_by_material(self, pieces) -> bool:
-
-        kings = 0
-        knights = 0
-        bishops = []
-
-        for piece in pieces:
-            if isinstance(piece, King):
-                kings += 1
-            elif isinstance(piece, Knight):
-                knights += 1
-            elif isinstance(piece, Bishop):
-                bishops.append(piece)
-            else:
-                # Любая другая фигура — мат возможен
-                return False
-
-        # Только короли
-        if kings == 2 and knights == 0 and len(bishops) == 0:
-            self.set_draw("Ничья: остались только короли.")
-            return True
-
-        # Только короли и один конь
-        elif kings == 2 and knights == 1 and len(bishops) == 0:
-            self.set_draw("Ничья: только короли и один конь — мат невозможен.")
-            return True
-
-        # Только короли и один слон
-        elif kings == 2 and knights == 0 and len(bishops) == 1:
-            self.set_draw("Ничья: только короли и один слон — мат невозможен.")
-            return True
-
-        # Только короли и несколько слонов
-        elif kings == 2 and knights == 0 and len(bishops) > 1:
-            same_color = bishops[0].is_dark_square()
-            for b in bishops[1:]:
-                if b.is_dark_square() != same_color:
-                    # Есть слоны на разных цветах — мат возможен
-                    return False
-            # Все слоны одного цвета — ничья
-            self.set_draw(
-                "Ничья: только короли и однопольные слоны — мат невозможен.")
-            return True
-
-        return False
+        self.draw_eval_bar()
+
+    def get_evaluation(self) -> int:
+        """Статическая оценка текущей позиции за белых (кэшируется по хешу позиции)"""
+        if self.eval_key != self.position.hash:
+            score = evaluate(self.position)
+            self.eval_score = score if self.position.side == WHITE else -score
+            self.eval_key = self.position.hash
+        return self.eval_score
+
+    def draw_eval_bar(self):
+        """Полоса оценки: белая часть снизу растёт с перевесом белых"""
+        rect = self.eval_bar_rect
+        pygame.draw.rect(self.screen, (60, 60, 60), rect)
+        # Перевес в несколько пешек почти заполняет полосу, но не целиком
+        share = 0.5 + 0.5 * math.tanh(self.get_evaluation() / 400)
+        white_height = round(rect.height * share)
+        pygame.draw.rect(self.screen, (245, 245, 245),
+                         (rect.x, rect.bottom - white_height, rect.width, white_height))
+        pygame.draw.line(self.screen, (200, 60, 60), (rect.x, rect.centery),
+                         (rect.right - 1, rect.centery))
+
+    def is_draw_by_material(self) -> bool:
+        """Ничья из-за недостатка материала (партию завершает handle_events)"""
+        return self.get_material_draw_reason() is not None
+
+    def get_material_draw_reason(self):
+        """Причина ничьей из-за недостатка материала или None"""
+        outcome = material_draw(self.position)
+        return DRAW_REASONS[outcome] if outcome else None
 
     def set_draw(self, reason):
         """Устанавливает ничью с указанной причиной"""
         self.game_result = "1/2-1/2"
         self.game_result_reason = reason
         self.is_game_over = True
-        # Обновляем интерфейс
-        self.draw()
-        pygame.display.flip()
 
     def add_draw_to_history(self):
         """Добавляет запись о ничьей в историю ходов"""
@@ -645,14 +759,14 @@ class Board:
                          (panel_x, panel_y, panel_width, panel_height), 3)
 
         # Шрифты
-        font_large = pygame.font.SysFont('Arial', 36, bold=True)
-        font_small = pygame.font.SysFont('Arial', 18)
-        font_button = pygame.font.SysFont('Arial', 24, bold=True)
+        font_large = get_font('Arial', 36, bold=True)
+        font_small = get_font('Arial', 18)
+        font_button = get_font('Arial', 24, bold=True)
 
         # Текст результата
-        result_text = font_large.render(self.game_result, True, (0, 0, 0))
-        reason_text = font_small.render(
-            self.game_result_reason, True, (0, 0, 0))
+        result_text = render_text(font_large, self.game_result, (0, 0, 0))
+        reason_text = render_text(
+            font_small, self.game_result_reason, (0, 0, 0))
 
         # Кнопка Новая игра
         button_width, button_height = 200, 40
@@ -666,7 +780,7 @@ class Board:
         pygame.draw.rect(self.screen, (0, 0, 0),
                          self.new_game_button, 2, border_radius=5)
 
-        button_text = font_button.render("Новая игра", True, (0, 0, 0))
+        button_text = render_text(font_button, "Новая игра", (0, 0, 0))
         self.screen.blit(button_text,
                          (button_x + (button_width - button_text.get_width()) // 2,
                           button_y + (button_height - button_text.get_height()) // 2))
@@ -681,6 +795,22 @@ class Board:
 
     def reset_game(self):
         """Сбрасывает игру в начальное состояние"""
+        self.clear_game_state()
+
+        # Пересоздаем доску и фигуры
+        self.create_board()
+        self.add_pieces()
+
+        # Перерисовываем экран
+        self.draw()
+
+    def clear_game_state(self):
+        """Сбрасывает параметры партии (фигуры расставляет вызывающий)"""
+        # Поиск по старой партии больше не нужен
+        if self.engine:
+            self.engine.cancel()
+        self.engine_label = None
+
         # Сбрасываем все игровые параметры
         self.pieces = []
         self.current_turn = Color.WHITE
@@ -688,84 +818,317 @@ class Board:
         self.show_selection = False
         self.last_double_step_pawn = None
         self.promotion_pawn = None
+        self.promotion_move = None
         self.halfmove_clock = 0
         self.is_game_over = False
         self.move_list = []
+        self.history_rows = []
         self.promotion_options = []
+        self.undo_stack = []
+        self.status_cache = {}
         self.game_result = None
         self.game_result_reason = ""
         self.scroll_y = 0
+        self.start_fen = START_FEN
 
         # Обновляем метку хода
-        self.turn_label = self.create_label(
-            "Ход: белые", (COLS * TILE_SIZE + 20, 20))
-
-        # Пересоздаем доску и фигуры
-        self.create_board()
-        self.add_pieces()
+        self.update_turn_label()
+
+    def load_fen(self, fen: str):
+        """
+        Расставляет позицию из строки FEN
+
+        Права на рокировку переносятся во флаги has_moved короля и ладей,
+        поле взятия на проходе — в last_double_step_pawn.
+
+        :raises ValueError: если строка не является корректным FEN или
+            поле взятия на проходе не соответствует расстановке; текущая
+            партия при этом не меняется
+        """
+        position = parse_fen(fen)
+        # Проверяем до изменения доски: отвергнутый FEN не должен портить текущую партию.
+        # Расстановку, очередь хода и счётчики доска воспроизводит всегда, а поле
+        # взятия на проходе — только если за ним стоит пешка, сделавшая двойной ход
+        ep = position.ep_square
+        if ep is not None:
+            behind = ep + 8 if position.side == WHITE else ep - 8
+            if (ep >> 3 != (2 if position.side == WHITE else 5)
+                    or position.board[behind] != (position.side ^ 1, PAWN)):
+                raise ValueError(f"FEN en passant square has no pawn behind it: {fen!r}")
+        self.clear_game_state()
+
+        placed = {}  # Клетка -> фигура; мейлбокс заполнит sync_position ниже
+        for sq, entry in enumerate(position.board):
+            if entry is None:
+                continue
+            color, kind = entry
+            piece = PIECE_CLASSES[kind](self.screen, square_pos(sq),
+                                        Color.WHITE if color == WHITE else Color.BLACK)
+            piece.parent_board = self
+            self.pieces.append(piece)
+            placed[sq] = piece
 
-        # Перерисовываем экран
-        self.draw()
+        # has_moved важен для рокировки: король и ладья «не ходили»,
+        # только если в FEN есть соответствующее право
+        rook_rights = {(7, 7): WHITE_KINGSIDE, (0, 7): WHITE_QUEENSIDE,
+                       (7, 0): BLACK_KINGSIDE, (0, 0): BLACK_QUEENSIDE}
+        for piece in self.pieces:
+            if isinstance(piece, King):
+                sides = (WHITE_KINGSIDE | WHITE_QUEENSIDE if piece.color == Color.WHITE
+                         else BLACK_KINGSIDE | BLACK_QUEENSIDE)
+                piece.has_moved = not position.castling & sides
+            elif isinstance(piece, Rook):
+                piece.has_moved = not position.castling & rook_rights.get(piece.position, 0)
+            elif isinstance(piece, Pawn):
+                piece.has_moved = piece.position[1] != (6 if piece.color == Color.WHITE else 1)
+
+        self.current_turn = Color.WHITE if position.side == WHITE else Color.BLACK
+        self.halfmove_clock = position.halfmove_clock
+        if ep is not None:
+            # Пешка соперника, только что сделавшая двойной ход, стоит за полем взятия
+            self.last_double_step_pawn = placed[ep + 8 if position.side == WHITE else ep - 8]
+
+        self.sync_position()
+        self.position.fullmove_number = position.fullmove_number
+        self.start_fen = fen
+        self.update_turn_label()
+        self.needs_full_redraw = True
+
+    def to_fen(self) -> str:
+        """Строка FEN для текущей позиции на доске"""
+        return to_fen(self.position)
+
+    def to_pgn(self, headers=None) -> str:
+        """Текст PGN сыгранной партии (ходы в SAN)"""
+        moves = [entry[0] for entry in self.undo_stack]
+        result = self.game_result if self.is_game_over and self.game_result else "*"
+        return export_pgn(moves, headers, self.start_fen, result)
+
+    def save_pgn(self, path: str, headers=None):
+        """Дописывает партию в файл PGN"""
+        with open(path, "a", encoding="utf-8") as file:
+            file.write(self.to_pgn(headers) + "\n")
+
+    def load_pgn(self, text: str):
+        """
+        Восстанавливает на доске первую партию из текста PGN
+
+        :raises ValueError: если в тексте нет партии или ход нелегален
+        """
+        game = next(read_games(io.StringIO(text)), None)
+        if game is None:
+            raise ValueError("No game in PGN")
+        # Сначала проверяем всю партию, чтобы не оставить доску в промежуточном состоянии
+        _, moves = replay(game)
+        self.load_fen(game.start_fen)
+        for move in moves:
+            self.play_move(move)
 
     def check_fifty_move_rule(self):
-        """Проверяет ничью по правилу 50 ходов"""
-        if self.halfmove_clock >= 100:  # 50 ходов = 100 полуходов
-            self.set_draw("Ничья по правилу 50 ходов")
-            return True
-        return False
+        """Проверяет ничью по правилу 50 ходов (партию завершает handle_events)"""
+        return self.halfmove_clock >= 100  # 50 ходов = 100 полуходов
 
     def resign(self):
         """Игрок сдаётся, партия завершается поражением"""
-        if self.current_turn == Color.WHITE:
+        if self.engine:
+            self.engine.cancel()
+        # Против движка сдаётся человек, даже если сейчас думает движок
+        loser = self.current_turn
+        if self.engine_color is not None:
+            loser = Color.BLACK if self.engine_color == Color.WHITE else Color.WHITE
+        if loser == Color.WHITE:
             self.game_result = "0-1"
             self.game_result_reason = "Белые сдались"
         else:
             self.game_result = "1-0"
             self.game_result_reason = "Чёрные сдались"
         self.is_game_over = True
-        self.draw()
-        pygame.display.flip()
 
     def is_in_check(self, color):
         """Проверяет, находится ли король данного цвета под шахом"""
-        king = next((p for p in self.pieces if isinstance(
-            p, King) and p.color == color), None)
-        if not king:
-            return False
+        return self.position.in_check(COLOR_INDEX[color])
+
+    def get_checkers(self, color):
+        """Фигуры соперника, объявившие шах королю данного цвета"""
+        return [self.piece_at(square_pos(sq))
+                for sq in iter_bits(self.position.checkers(COLOR_INDEX[color]))]
+
+    def get_pinned_pieces(self, color):
+        """Фигуры данного цвета, связанные со своим королём"""
+        return [self.piece_at(square_pos(sq))
+                for sq in iter_bits(self.position.pinned(COLOR_INDEX[color]))]
 
-        king_pos = king.position
+    def generate_moves(self, color):
+        """Генератор возможных ходов всех фигур цвета color (без учёта шаха)"""
         for piece in self.pieces:
-            if piece.color != color:
-                if piece.is_valid_move(king_pos, self.pieces):
-                    return True
-        return False
+            if piece.color == color:
+                yield from piece.generate_moves()
+
+    def get_legal_move_map(self):
+        """
+        Легальные ходы стороны на ходу, сгруппированные по клетке, откуда ходит фигура
+
+        Строится один раз на позицию: выбор фигуры, клик, проверки мата и пата
+        и подсказки ходов читают один и тот же список
+        """
+        key = self.position.hash
+        if self.legal_moves_key != key:
+            grouped = {}
+            for move in self.position.generate_legal_moves():
+                grouped.setdefault(move & 63, []).append(move)
+            self.legal_moves_by_square = grouped
+            self.legal_moves_key = key
+        return self.legal_moves_by_square
+
+    def invalidate_legal_moves(self):
+        self.legal_moves_key = None
+        self.legal_moves_by_square = {}
+
+    def has_legal_moves(self, color) -> bool:
+        """Есть ли у стороны color хотя бы один легальный ход"""
+        if color == self.current_turn:
+            return bool(self.get_legal_move_map())
+        is_legal = self.position.is_legal
+        return any(is_legal(move) for move in self.generate_moves(color))
+
+    def find_legal_move(self, piece, cell):
+        """Первый легальный ход фигуры на клетку cell или None"""
+        target = square_index(cell)
+        for move in self.get_legal_move_map().get(piece.square, ()):
+            if move_to(move) == target:
+                return move
+        return None
+
+    def play_move(self, move: int):
+        """Записывает ход в историю партии и выполняет его"""
+        self.add_move_to_history(move)
+        self.make_move(move)
+
+    def piece_at(self, pos):
+        """Фигура на клетке pos или None (через массив клеток, без перебора фигур)"""
+        return self.squares[pos[1] * 8 + pos[0]]
+
+    def make_move(self, move: int):
+        """
+        Выполняет ход на доске и в битбордах и передаёт ход сопернику
+
+        В стек отмены сохраняются побитая фигура, прежние флаги has_moved,
+        last_double_step_pawn и счётчик полуходов
+        """
+        from_sq = move_from(move)
+        to_sq = move_to(move)
+        to_pos = square_pos(to_sq)
+        promotion = move_promotion(move)
+        flags = move_flags(move)
+        squares = self.squares
+        piece = squares[from_sq]
+
+        captured = None
+        captured_index = None
+        if flags & EN_PASSANT:
+            # Побитая пешка стоит позади поля взятия
+            captured = squares[to_sq + 8 if piece.color == Color.WHITE else to_sq - 8]
+        elif flags & CAPTURE:
+            captured = squares[to_sq]
+        if captured:
+            captured_index = self.pieces.index(captured)
+            self.pieces.pop(captured_index)
+            squares[captured.square] = None
+
+        rook = None
+        rook_had_moved = False
+        if flags & CASTLING:
+            rook_from, rook_to = CASTLING_ROOK[to_sq]
+            rook = squares[rook_from]
+            rook_had_moved = rook.has_moved
+            piece.do_castling_move(to_pos, self.pieces)
+            squares[rook_from] = None
+            squares[rook_to] = rook
+
+        self.undo_stack.append((move, piece, piece.has_moved, captured, captured_index,
+                                rook, rook_had_moved, self.last_double_step_pawn,
+                                self.halfmove_clock))
+
+        piece.move_to(to_pos)
+        squares[from_sq] = None
+        squares[to_sq] = piece
+
+        # Превращение пешки: новая фигура встаёт на место пешки в списке
+        if promotion:
+            new_piece = PROMOTION_CLASSES[promotion](self.screen, to_pos, piece.color)
+            new_piece.parent_board = self
+            new_piece.has_moved = True
+            self.pieces[self.pieces.index(piece)] = new_piece
+            squares[to_sq] = new_piece
+
+        # Обновляем счётчик 50 ходов
+        if captured or isinstance(piece, Pawn):
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        # Флаг двойного хода пешки
+        self.last_double_step_pawn = piece if flags & DOUBLE_PUSH else None
+
+        self.position.make_move(move)
+        self.invalidate_legal_moves()
+        key = self.position.hash
+        self.repetitions[key] = self.repetitions.get(key, 0) + 1
+        self.switch_turn()
+
+    def unmake_move(self):
+        """Отменяет последний ход, сделанный через make_move"""
+        (move, piece, had_moved, captured, captured_index, rook, rook_had_moved,
+         last_double_step_pawn, halfmove_clock) = self.undo_stack.pop()
+        from_sq = move_from(move)
+        to_sq = move_to(move)
+        squares = self.squares
+
+        if move_promotion(move):
+            promoted = squares[to_sq]
+            self.pieces[self.pieces.index(promoted)] = piece
+
+        piece.square = from_sq
+        piece.has_moved = had_moved
+        squares[to_sq] = None
+        squares[from_sq] = piece
+
+        if rook:
+            rook_from, rook_to = CASTLING_ROOK[to_sq]
+            rook.square = rook_from
+            rook.has_moved = rook_had_moved
+            squares[rook_to] = None
+            squares[rook_from] = rook
+
+        if captured:
+            self.pieces.insert(captured_index, captured)
+            squares[captured.square] = captured
+
+        self.last_double_step_pawn = last_double_step_pawn
+        self.halfmove_clock = halfmove_clock
+
+        key = self.position.hash
+        self.repetitions[key] -= 1
+        if not self.repetitions[key]:
+            del self.repetitions[key]
+        self.position.unmake_move()
+        self.invalidate_legal_moves()
+        self.switch_turn()
 
     def get_legal_moves(self, piece):
         """Возвращает список ходов фигуры, которые не оставляют своего короля под шахом"""
         legal_moves = []
-        # Перебираем все клетки доски
-        for x in range(8):
-            for y in range(8):
-                move = (x, y)
-                if piece.is_valid_move(move, self.pieces):
-                    original_pos = piece.position
-                    captured_piece = next(
-                        (p for p in self.pieces if p.position == move and p.color != piece.color), None)
-
-                    # временно выполняем ход
-                    piece.position = move
-                    if captured_piece:
-                        self.pieces.remove(captured_piece)
-
-                    # проверяем шах
-                    if not self.is_in_check(piece.color):
-                        legal_moves.append(move)
-
-                    # откат
-                    piece.position = original_pos
-                    if captured_piece:
-                        self.pieces.append(captured_piece)
-
+        if piece.color == self.current_turn:
+            for move in self.get_legal_move_map().get(piece.square, ()):
+                target = square_pos(move_to(move))
+                if target not in legal_moves:
+                    legal_moves.append(target)
+            return legal_moves
+        for move in piece.generate_moves():
+            # Ход выполняется и откатывается только на битбордах
+            target = square_pos(move_to(move))
+            if target not in legal_moves and self.position.is_legal(move):
+                legal_moves.append(target)
         return legal_moves
 
     def is_checkmate(self, color) -> bool:
@@ -773,37 +1136,35 @@ class Board:
         if not self.is_in_check(color):
             return False  # Мат только если есть шах
 
-        # Перебираем все фигуры данного цвета
-        for piece in self.pieces:
-            if piece.color == color:
-                legal_moves = self.get_legal_moves(piece)
-                if legal_moves:  # Если хотя бы один ход возможен
-                    return False
-
         # Нет ходов и король под шахом => мат
-        winner = "белые" if color == Color.BLACK else "чёрные"
-        self.set_checkmate(winner)
-        return True
+        return not self.has_legal_moves(color)
 
     def set_checkmate(self, winner):
         """Устанавливает мат и завершает игру"""
         self.game_result = "1-0" if winner == "белые" else "0-1"
         self.game_result_reason = f"Мат! Победили {winner}."
         self.is_game_over = True
-        # Перерисовываем экран сразу
-        self.draw()
-        pygame.display.flip()
 
     def run(self):
         clock = pygame.time.Clock()
         running = True
         while running:
             running = self.handle_events()
+            self.update_engine()
             self.draw()
             clock.tick(60)
+        if self.engine:
+            self.engine.cancel()
         pygame.quit()
 
 
 if __name__ == "__main__":
-    game = Board()
+    import argparse
+    parser = argparse.ArgumentParser(description="Шахматы")
+    parser.add_argument("--engine", choices=["white", "black"],
+                        help="цвет, за который играет компьютер")
+    parser.add_argument("--time", type=float, default=1.0,
+                        help="время на ход компьютера, с")
+    args = parser.parse_args()
+    game = Board(Color(args.engine) if args.engine else None, args.time)
     game.run()
@@ -0,0 +1,42 @@
+from collections import OrderedDict
+from typing import Dict, Tuple
+import pygame
+
+# Максимальное число готовых текстовых поверхностей в кэше
+TEXT_CACHE_SIZE = 512
+
+_fonts: Dict[Tuple[str, int, bool], pygame.font.Font] = {}
+_text_cache: "OrderedDict[tuple, pygame.Surface]" = OrderedDict()
+
+
+def get_font(name: str = 'Arial', size: int = 16, bold: bool = False) -> pygame.font.Font:
+    """Шрифт из реестра: системный поиск шрифта выполняется один раз"""
+    key = (name, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.SysFont(name, size, bold=bold)
+    return font
+
+
+def render_text(font: pygame.font.Font, text: str, color=(0, 0, 0),
+                antialias: bool = True) -> pygame.Surface:
+    """
+    Отрисованный текст из LRU-кэша по ключу (шрифт, текст, цвет)
+
+    Возвращаемую поверхность нельзя изменять — она общая для всех вызовов
+    """
+    key = (font, text, tuple(color), antialias)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    surface = font.render(text, antialias, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+
+def clear_text_cache():
+    _text_cache.clear()
@@ -2,8 +2,18 @@ import pygame
 from typing import Tuple, Optional
 from colors import Color
 from constants import TILE_SIZE
+from rules import SQUARE_POSITIONS, WHITE, BLACK
+from sprites import get_sprite
+from fonts import get_font, render_text
+
+# Цвет фигуры интерфейса -> цвет в rules (пакет правил не знает о Color)
+COLOR_INDEX = {Color.WHITE: WHITE, Color.BLACK: BLACK}
 
 class Piece:
+    kind = None  # Тип фигуры в битбордовом представлении
+    # Без __dict__ на каждый экземпляр; клетка хранится индексом 0–63
+    __slots__ = ("screen", "square", "color", "parent_board", "has_moved", "sprite")
+
     def __init__(self, parent_surface: pygame.Surface, pos: Tuple[int, int], 
                  color: Color, texture_path: Optional[str] = None):
         """
@@ -15,19 +25,21 @@ class Piece:
         :param texture_path: Путь к изображению фигуры
         """
         self.screen = parent_surface
-        self.position = pos  # (x, y) координаты на доске
+        self.position = pos  # (x, y) координаты на доске, хранятся как square
         self.color = color
         self.parent_board = None  # Ссылка на родительскую доску
-        self.sprite = None
         self.has_moved = False  # Для отслеживания первого хода
-        
-        if texture_path:
-            try:
-                self.sprite = pygame.image.load(texture_path)
-                self.sprite = pygame.transform.scale(self.sprite, (TILE_SIZE, TILE_SIZE))
-            except Exception as e:
-                print(f"Error loading sprite: {e}")
-                self.sprite = None
+        # Ссылка на общий спрайт из атласа (диск читается один раз на файл)
+        self.sprite = get_sprite(texture_path) if texture_path else None
+
+    @property
+    def position(self) -> Tuple[int, int]:
+        """Координаты (x, y) клетки фигуры"""
+        return SQUARE_POSITIONS[self.square]
+
+    @position.setter
+    def position(self, pos: Tuple[int, int]):
+        self.square = pos[1] * 8 + pos[0]
 
     def move_to(self, new_position: Tuple[int, int]):
         """Перемещает фигуру на новую позицию"""
@@ -49,10 +61,10 @@ class Piece:
                              TILE_SIZE//3)
             
             # Добавляем буквенное обозначение фигуры
-            font = pygame.font.SysFont('Arial', 24)
+            font = get_font('Arial', 24)
             symbol = self.get_symbol()
             text_color = (0, 0, 0) if self.color == Color.WHITE else (255, 255, 255)
-            text = font.render(symbol, True, text_color)
+            text = render_text(font, symbol, text_color)
             text_rect = text.get_rect(center=(x + TILE_SIZE//2, y + TILE_SIZE//2))
             self.screen.blit(text, text_rect)
 
@@ -67,10 +79,10 @@ class Piece:
                              (pos[0] + TILE_SIZE//2, pos[1] + TILE_SIZE//2), 
                              TILE_SIZE//3)
             
-            font = pygame.font.SysFont('Arial', 24)
+            font = get_font('Arial', 24)
             symbol = self.get_symbol()
             text_color = (0, 0, 0) if self.color == Color.WHITE else (255, 255, 255)
-            text = font.render(symbol, True, text_color)
+            text = render_text(font, symbol, text_color)
             text_rect = text.get_rect(center=(pos[0] + TILE_SIZE//2, pos[1] + TILE_SIZE//2))
             surface.blit(text, text_rect)
 
@@ -78,18 +90,33 @@ class Piece:
         """Возвращает символьное обозначение фигуры (для текстовой отрисовки)"""
         return "?"
 
-    def is_valid_move(self, new_pos: Tuple[int, int], pieces: list) -> bool:
-        """Базовая проверка, общая для всех фигур"""
+    def is_valid_move(self, new_pos: Tuple[int, int], pieces: Optional[list] = None) -> bool:
+        """
+        Проверяет ход по битбордам родительской доски
+        (без учёта шаха своему королю)
+        """
         # Нельзя оставаться на месте
-        if new_pos == self.position:
+        if new_pos == self.position or self.parent_board is None:
             return False
-            
-        # Нельзя бить свои фигуры
-        for piece in pieces:
-            if piece.position == new_pos and piece.color == self.color:
-                return False
-                
-        return True  # Базовые проверки пройдены
+        targets = self.targets(self.parent_board.position)
+        return bool(targets >> (new_pos[1] * 8 + new_pos[0]) & 1)
+
+    def targets(self, position) -> int:
+        """Битборд клеток, куда фигура может пойти в позиции position"""
+        return position.piece_targets(self.square)
+
+    def generate_moves(self, position=None):
+        """
+        Генератор возможных ходов фигуры без учёта шаха своему королю
+
+        Ничего не меняет ни в фигуре, ни в позиции. Ходы упакованы в int
+        (см. position.encode_move)
+
+        :param position: Позиция (по умолчанию — позиция родительской доски)
+        """
+        if position is None:
+            position = self.parent_board.position
+        yield from position.moves_from(self.square, self.targets(position))
 
     def resets_fifty_move_counter(self, new_pos: Tuple[int, int], pieces: list) -> bool:
         """
@@ -97,6 +124,9 @@ class Piece:
         (по умолчанию - взятие или ход пешкой сбрасывает счетчик)
         """
         # Проверка на взятие
+        if self.parent_board is not None:
+            piece = self.parent_board.piece_at(new_pos)
+            return piece is not None and piece.color != self.color
         for piece in pieces:
             if piece.position == new_pos and piece.color != self.color:
                 return True
@@ -1,10 +1,14 @@
-from typing import List, Tuple, Optional
+from typing import Tuple, Optional
 import pygame
 from colors import Color
-from piece import Piece
+from piece import Piece, COLOR_INDEX
+from rules import ROOK
 
 
 class Rook(Piece):
+    kind = ROOK
+    __slots__ = ()
+
     def __init__(self, parent_surface: pygame.Surface, pos: Tuple[int, int], color: Color, texture_path: Optional[str] = None):
         """
         Класс ладьи (rook)
@@ -21,47 +25,13 @@ class Rook(Piece):
 
     def move_to(self, new_position: Tuple[int, int]):
         super().move_to(new_position)
-        self.has_moved = True  
-    def is_valid_move(self, new_position: Tuple[int, int], pieces: List[Piece], ignore_checks: bool = False) -> bool:
+        self.has_moved = True
+
+    def targets(self, position) -> int:
         """
-        Проверяет допустимость хода для ладьи:
+        Ходы ладьи по битбордам:
         - Движение только по горизонтали или вертикали
         - Не может перепрыгивать через фигуры
         - Может брать фигуры противника
         """
-        # Проверка что не пытаемся пойти в ту же клетку
-        if new_position == self.position:
-            return False
-
-        # Проверка движения строго по горизонтали или вертикали
-        if new_position[0] != self.position[0] and new_position[1] != self.position[1]:
-            return False
-
-        # Определяем направление движения
-        step_x = 0
-        step_y = 0
-
-        if new_position[0] != self.position[0]:  # Горизонтальное движение
-            step_x = 1 if new_position[0] > self.position[0] else -1
-        else:  # Вертикальное движение
-            step_y = 1 if new_position[1] > self.position[1] else -1
-
-        # Проверяем все клетки по пути
-        current_x = self.position[0] + step_x
-        current_y = self.position[1] + step_y
-
-        while current_x != new_position[0] or current_y != new_position[1]:
-            # Проверяем каждую клетку на пути
-            for piece in pieces:
-                if piece.position == (current_x, current_y):
-                    return False  # Путь заблокирован
-
-            current_x += step_x
-            current_y += step_y
-
-        # Проверка конечной клетки
-        for piece in pieces:
-            if piece.position == new_position:
-                return piece.color != self.color  # Можно брать вражеские фигуры
-
-        return True  # Ход допустим
+        return position.rook_targets(self.square, COLOR_INDEX[self.color])
@@ -0,0 +1,24 @@
+"""
+Правила шахмат без зависимости от pygame: позиция на битбордах,
+генерация ходов и определение результата партии
+"""
+from .position import (
+    Position,
+    WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+    PIECE_LETTERS, FULL,
+    CAPTURE, DOUBLE_PUSH, EN_PASSANT, CASTLING,
+    WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+    WHITE_KING_HOME, BLACK_KING_HOME,
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, BETWEEN, LINE,
+    CASTLING_MASK, CASTLING_ROOK, PROMOTION_RANKS, PROMOTION_PIECES,
+    SQUARE_POSITIONS, square_index, square_pos, square_name, parse_square, encode_move, move_to_uci, move_from, move_to,
+    move_promotion, move_flags, iter_bits, popcount,
+    rook_attacks, bishop_attacks, queen_attacks,
+)
+from .fen import START_FEN, parse_fen, to_fen
+from .san import move_to_san, parse_san
+from .result import (
+    CHECKMATE, STALEMATE, FIFTY_MOVES, THREEFOLD_REPETITION, FIVEFOLD_REPETITION,
+    KINGS_ONLY, LONE_KNIGHT, LONE_BISHOP, SAME_COLOR_BISHOPS,
+    material_draw, game_status, result_string,
+)
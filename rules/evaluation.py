@@ -0,0 +1,355 @@
+"""
+Статическая оценка позиции
+
+Оценка складывается из материала и позиционных таблиц (их Position ведёт
+инкрементально), пешечной структуры, подвижности фигур и безопасности
+короля. У каждого слагаемого две оценки — для миттельшпиля и эндшпиля,
+итог плавно смешивается по фазе партии.
+
+    python -m rules.evaluation "<FEN>" ...
+    python -m rules.evaluation --file positions.fen --breakdown
+"""
+import argparse
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+from .position import (Position, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING,
+                       KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+                       rook_attacks, bishop_attacks, iter_bits, popcount)
+from .psqt import PHASE_WEIGHTS, MAX_PHASE, PSQ, unpack
+from .fen import parse_fen
+from .result import material_draw
+
+# Пешечная структура: штрафы (миттельшпиль, эндшпиль) за каждую слабую пешку
+DOUBLED_PENALTY = (10, 20)
+ISOLATED_PENALTY = (12, 15)
+BACKWARD_PENALTY = (8, 10)
+# Бонус проходной по горизонтали, считая от своего края доски
+PASSED_BONUS_MG = (0, 5, 10, 15, 30, 50, 80, 0)
+PASSED_BONUS_EG = (0, 10, 15, 25, 50, 90, 140, 0)
+
+BISHOP_PAIR = (30, 50)
+
+# Подвижность: вес клетки и «нормальное» число ходов фигуры для коня, слона, ладьи, ферзя
+MOBILITY_MG = (0, 4, 3, 2, 1, 0)
+MOBILITY_EG = (0, 4, 3, 4, 2, 0)
+MOBILITY_BASE = (0, 4, 6, 7, 13, 0)
+
+# Безопасность короля: бонус за пешку щита и вес атаки на клетку вокруг короля
+SHIELD_BONUS = 10
+ATTACK_WEIGHTS = (0, 2, 2, 3, 5, 0)
+# Доля штрафа (в процентах) в зависимости от числа атакующих фигур:
+# одна фигура у короля ещё не атака
+ATTACKER_SCALE = (0, 0, 50, 75, 88, 94, 97, 99)
+ATTACK_UNIT = 8
+
+PAWN_TABLE_ENTRIES = 1 << 14
+
+
+def _file_mask(x: int) -> int:
+    return sum(1 << (y * 8 + x) for y in range(8))
+
+
+FILE_MASKS = tuple(_file_mask(x) for x in range(8))
+ADJACENT_FILES = tuple((FILE_MASKS[x - 1] if x > 0 else 0) | (FILE_MASKS[x + 1] if x < 7 else 0)
+                       for x in range(8))
+
+
+def _rows_mask(rows: Iterable[int]) -> int:
+    return sum(0xFF << (y * 8) for y in rows)
+
+
+def _span_tables():
+    # Белые идут к меньшим y, чёрные — к большим
+    passed = ([0] * 64, [0] * 64)
+    support = ([0] * 64, [0] * 64)
+    shield = ([0] * 64, [0] * 64)
+    for sq in range(64):
+        x, y = sq & 7, sq >> 3
+        files = FILE_MASKS[x] | ADJACENT_FILES[x]
+        passed[WHITE][sq] = files & _rows_mask(range(y))
+        passed[BLACK][sq] = files & _rows_mask(range(y + 1, 8))
+        support[WHITE][sq] = ADJACENT_FILES[x] & _rows_mask(range(y, 8))
+        support[BLACK][sq] = ADJACENT_FILES[x] & _rows_mask(range(y + 1))
+        shield[WHITE][sq] = files & _rows_mask(range(max(0, y - 2), y))
+        shield[BLACK][sq] = files & _rows_mask(range(y + 1, min(8, y + 3)))
+    return passed, support, shield
+
+
+# PASSED_MASKS — клетки впереди пешки на своей и соседних вертикалях (нет там
+# пешек соперника — пешка проходная), SUPPORT_MASKS — соседние вертикали на
+# уровне пешки и позади неё, SHIELD_MASKS — две горизонтали перед королём
+PASSED_MASKS, SUPPORT_MASKS, SHIELD_MASKS = _span_tables()
+
+
+def game_phase(position: Position) -> int:
+    """Фаза партии: MAX_PHASE при полном наборе фигур, 0 — пешечный эндшпиль"""
+    phase = 0
+    for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+        phase += PHASE_WEIGHTS[kind] * popcount(position.pieces[WHITE][kind]
+                                                | position.pieces[BLACK][kind])
+    return min(phase, MAX_PHASE)
+
+
+def taper(mg: int, eg: int, phase: int) -> int:
+    """Смешивает оценки миттельшпиля и эндшпиля по фазе партии (с округлением к нулю)"""
+    value = mg * phase + eg * (MAX_PHASE - phase)
+    # Округление вниз сдвигало бы оценку в пользу чёрных: позиция и её
+    # зеркальная копия с другим цветом получали бы разные оценки
+    return value // MAX_PHASE if value >= 0 else -(-value // MAX_PHASE)
+
+
+def pawn_structure(position: Position) -> Tuple[int, int, int]:
+    """
+    Оценка пешечной структуры с точки зрения белых
+
+    Зависит только от расположения пешек: сдвоенные, изолированные,
+    отсталые и проходные пешки.
+
+    :return: (миттельшпиль, эндшпиль, битборд проходных пешек обоих цветов)
+    """
+    pawns = (position.pieces[WHITE][PAWN], position.pieces[BLACK][PAWN])
+    mg = eg = 0
+    passed = 0
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        own = pawns[color]
+        enemy = pawns[color ^ 1]
+        step = -8 if color == WHITE else 8
+        color_mg = color_eg = 0
+        for x in range(8):
+            count = popcount(own & FILE_MASKS[x])
+            if count > 1:
+                color_mg -= DOUBLED_PENALTY[0] * (count - 1)
+                color_eg -= DOUBLED_PENALTY[1] * (count - 1)
+        for sq in iter_bits(own):
+            if not own & ADJACENT_FILES[sq & 7]:
+                color_mg -= ISOLATED_PENALTY[0]
+                color_eg -= ISOLATED_PENALTY[1]
+            elif (not own & SUPPORT_MASKS[color][sq]
+                  and PAWN_ATTACKS[color][sq + step] & enemy):
+                # Соседние пешки ушли вперёд, а поле перед пешкой бьёт пешка соперника
+                color_mg -= BACKWARD_PENALTY[0]
+                color_eg -= BACKWARD_PENALTY[1]
+            if not enemy & PASSED_MASKS[color][sq]:
+                passed |= 1 << sq
+                rank = 7 - (sq >> 3) if color == WHITE else sq >> 3
+                color_mg += PASSED_BONUS_MG[rank]
+                color_eg += PASSED_BONUS_EG[rank]
+        mg += sign * color_mg
+        eg += sign * color_eg
+    return mg, eg, passed
+
+
+class PawnTable:
+    def __init__(self, entries: int = PAWN_TABLE_ENTRIES):
+        """
+        Кэш оценок пешечной структуры по Zobrist-ключу пешек (Position.pawn_hash)
+
+        Пешки двигаются редко, поэтому в поиске одна и та же структура
+        встречается в тысячах узлов. Размер фиксирован (округляется вниз до
+        степени двойки), место в памяти не растёт: новая запись вытесняет
+        старую с тем же индексом. Полный ключ хранится для проверки коллизий.
+
+        :param entries: Число записей
+        """
+        self.mask = (1 << max(0, entries.bit_length() - 1)) - 1
+        self.clear()
+
+    def __len__(self) -> int:
+        return self.mask + 1
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+    def probe(self, position: Position) -> Tuple[int, int, int]:
+        """pawn_structure(position) из кэша или с подсчётом и записью в кэш"""
+        key = position.pawn_hash
+        index = key & self.mask
+        self.probes += 1
+        if self.keys[index] == key:
+            self.hits += 1
+            return self.mg[index], self.eg[index], self.passed[index]
+        mg, eg, passed = pawn_structure(position)
+        self.keys[index] = key
+        self.mg[index] = mg
+        self.eg[index] = eg
+        self.passed[index] = passed
+        return mg, eg, passed
+
+    def clear(self):
+        """Очищает записи и счётчики"""
+        size = self.mask + 1
+        # Пустая запись — ключ 0 с нулевыми оценками, что верно и для позиции без пешек
+        self.keys = array("Q", bytes(8 * size))
+        self.mg = array("i", bytes(4 * size))
+        self.eg = array("i", bytes(4 * size))
+        self.passed = array("Q", bytes(8 * size))
+        self.probes = 0
+        self.hits = 0
+
+
+def piece_activity(position: Position) -> Tuple[int, int, int]:
+    """
+    Подвижность фигур и безопасность королей с точки зрения белых
+
+    Атаки фигур считаются один раз и идут в оба слагаемых.
+
+    :return: (подвижность мг, подвижность эг, безопасность короля мг) — в эндшпиле
+        атака на короля и пешечный щит не оцениваются
+    """
+    pieces = position.pieces
+    occupied = position.occupancy[WHITE] | position.occupancy[BLACK]
+    mobility_mg = mobility_eg = king_mg = 0
+    for color, sign in ((WHITE, 1), (BLACK, -1)):
+        own = pieces[color]
+        enemy = pieces[color ^ 1]
+        # Клетки, занятые своими или битые пешками соперника, ходами не считаются
+        enemy_pawn_attacks = 0
+        for sq in iter_bits(enemy[PAWN]):
+            enemy_pawn_attacks |= PAWN_ATTACKS[color ^ 1][sq]
+        available = ~(position.occupancy[color] | enemy_pawn_attacks)
+        enemy_king = enemy[KING].bit_length() - 1
+        zone = KING_ATTACKS[enemy_king] | enemy[KING] if enemy[KING] else 0
+        attackers = units = 0
+        for kind in (KNIGHT, BISHOP, ROOK, QUEEN):
+            for sq in iter_bits(own[kind]):
+                if kind == KNIGHT:
+                    attacks = KNIGHT_ATTACKS[sq]
+                elif kind == BISHOP:
+                    attacks = bishop_attacks(sq, occupied)
+                elif kind == ROOK:
+                    attacks = rook_attacks(sq, occupied)
+                else:
+                    attacks = bishop_attacks(sq, occupied) | rook_attacks(sq, occupied)
+                moves = popcount(attacks & available) - MOBILITY_BASE[kind]
+                mobility_mg += sign * MOBILITY_MG[kind] * moves
+                mobility_eg += sign * MOBILITY_EG[kind] * moves
+                hits = attacks & zone
+                if hits:
+                    attackers += 1
+                    units += ATTACK_WEIGHTS[kind] * popcount(hits)
+        # Атака на короля соперника — плюс атакующей стороне, важна в миттельшпиле
+        king_mg += sign * (units * ATTACK_UNIT * ATTACKER_SCALE[min(attackers, 7)] // 100)
+        # Пешечный щит своего короля
+        if own[KING]:
+            king = own[KING].bit_length() - 1
+            king_mg += sign * SHIELD_BONUS * popcount(own[PAWN] & SHIELD_MASKS[color][king])
+    return mobility_mg, mobility_eg, king_mg
+
+
+def _bishop_pair(position: Position) -> int:
+    # +1 — пара слонов только у белых, -1 — только у чёрных
+    pieces = position.pieces
+    white = pieces[WHITE][BISHOP] & (pieces[WHITE][BISHOP] - 1) != 0
+    black = pieces[BLACK][BISHOP] & (pieces[BLACK][BISHOP] - 1) != 0
+    return white - black
+
+
+def evaluate(position: Position, pawn_table: Optional[PawnTable] = None) -> int:
+    """
+    Статическая оценка в сантипешках с точки зрения стороны на ходу
+
+    :param pawn_table: Кэш пешечной структуры (поиск держит свой; без него
+        структура считается заново)
+    """
+    if material_draw(position) is not None:
+        return 0
+    mg, eg = unpack(position.psq)
+    if pawn_table is not None:
+        pawns_mg, pawns_eg, _ = pawn_table.probe(position)
+    else:
+        pawns_mg, pawns_eg, _ = pawn_structure(position)
+    mobility_mg, mobility_eg, king_mg = piece_activity(position)
+    pair = _bishop_pair(position)
+    mg += pawns_mg + mobility_mg + king_mg + pair * BISHOP_PAIR[0]
+    eg += pawns_eg + mobility_eg + pair * BISHOP_PAIR[1]
+    score = taper(mg, eg, game_phase(position))
+    return score if position.side == WHITE else -score
+
+
+def compute_psqt(position: Position) -> int:
+    """Материал и позиционные таблицы, пересчитанные с нуля (упакованы как Position.psq)"""
+    total = 0
+    for color in (WHITE, BLACK):
+        for kind, bb in enumerate(position.pieces[color]):
+            table = PSQ[color][kind]
+            for sq in iter_bits(bb):
+                total += table[sq]
+    return total
+
+
+def evaluate_breakdown(position: Position) -> Dict[str, int]:
+    """
+    Слагаемые оценки с точки зрения белых, каждое уже смешано по фазе
+
+    Ключи: material (материал и позиционные таблицы), pawns, mobility,
+    king_safety, bishop_pair, а также phase и total — итог, как у evaluate,
+    но всегда за белых.
+    """
+    phase = game_phase(position)
+    pawns_mg, pawns_eg, _ = pawn_structure(position)
+    mobility_mg, mobility_eg, king_mg = piece_activity(position)
+    pair = _bishop_pair(position)
+    total = evaluate(position)
+    return {
+        "material": taper(*unpack(position.psq), phase),
+        "pawns": taper(pawns_mg, pawns_eg, phase),
+        "mobility": taper(mobility_mg, mobility_eg, phase),
+        "king_safety": taper(king_mg, 0, phase),
+        "bishop_pair": taper(pair * BISHOP_PAIR[0], pair * BISHOP_PAIR[1], phase),
+        "phase": phase,
+        "total": total if position.side == WHITE else -total,
+    }
+
+
+# === Пакетная оценка ===
+
+def score_positions(fens: Iterable[str]) -> List[Tuple[str, int]]:
+    """Оценки позиций пакетом: [(FEN, оценка за белых), ...] в исходном порядке"""
+    scores = []
+    for fen in fens:
+        position = parse_fen(fen)
+        score = evaluate(position)
+        scores.append((fen, score if position.side == WHITE else -score))
+    return scores
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Статическая оценка позиций")
+    parser.add_argument("fens", nargs="*", help="позиции в FEN")
+    parser.add_argument("--file", help="файл с позициями, по одной FEN в строке")
+    parser.add_argument("--breakdown", action="store_true", help="показать слагаемые оценки")
+    args = parser.parse_args(argv)
+
+    fens = list(args.fens)
+    if args.file:
+        with open(args.file, encoding="utf-8") as stream:
+            fens.extend(line.strip() for line in stream if line.strip())
+    if not fens:
+        parser.error("нужна хотя бы одна позиция")
+
+    start = time.perf_counter()
+    try:
+        scores = score_positions(fens)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    for fen, score in scores:
+        if args.breakdown:
+            terms = evaluate_breakdown(parse_fen(fen))
+            details = " ".join(f"{name} {value}" for name, value in terms.items()
+                               if name != "total")
+            print(f"{score:+6d}  {details}  {fen}")
+        else:
+            print(f"{score:+6d}  {fen}")
+    if len(scores) > 1:
+        rate = len(scores) / elapsed if elapsed > 0 else 0
+        print(f"{len(scores)} positions in {elapsed:.3f} s ({rate:.0f} positions/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
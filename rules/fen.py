@@ -0,0 +1,90 @@
+from .position import (Position, WHITE, BLACK, PIECE_LETTERS,
+                       WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE,
+                       square_name, parse_square)
+
+# Начальная расстановка (та же, что в Board.add_pieces)
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+_CASTLING_LETTERS = [("K", WHITE_KINGSIDE), ("Q", WHITE_QUEENSIDE),
+                     ("k", BLACK_KINGSIDE), ("q", BLACK_QUEENSIDE)]
+
+
+def parse_fen(fen: str) -> Position:
+    """
+    Создаёт позицию из строки FEN
+
+    :raises ValueError: если строка не является корректным FEN
+    """
+    fields = fen.split()
+    if len(fields) < 4:
+        raise ValueError(f"Invalid FEN: {fen!r}")
+    placement, side, castling, ep = fields[:4]
+    halfmove = fields[4] if len(fields) > 4 else "0"
+    fullmove = fields[5] if len(fields) > 5 else "1"
+
+    position = Position()
+    rows = placement.split("/")
+    if len(rows) != 8:
+        raise ValueError(f"Invalid FEN placement: {placement!r}")
+    # Индексы клеток идут так же, как в FEN: с a8 слева направо
+    for y, row in enumerate(rows):
+        x = 0
+        for ch in row:
+            if ch.isdigit():
+                x += int(ch)
+                continue
+            kind = PIECE_LETTERS.find(ch.upper())
+            if kind < 0 or x > 7:
+                raise ValueError(f"Invalid FEN placement: {placement!r}")
+            position.put(y * 8 + x, WHITE if ch.isupper() else BLACK, kind)
+            x += 1
+        if x != 8:
+            raise ValueError(f"Invalid FEN placement: {placement!r}")
+
+    if side not in ("w", "b"):
+        raise ValueError(f"Invalid FEN side to move: {side!r}")
+    position.side = WHITE if side == "w" else BLACK
+
+    if castling != "-":
+        for ch in castling:
+            rights = dict(_CASTLING_LETTERS).get(ch)
+            if rights is None:
+                raise ValueError(f"Invalid FEN castling rights: {castling!r}")
+            position.castling |= rights
+
+    position.ep_square = None if ep == "-" else parse_square(ep)
+    try:
+        position.halfmove_clock = int(halfmove)
+        position.fullmove_number = int(fullmove)
+    except ValueError:
+        raise ValueError(f"Invalid FEN move counters: {fen!r}")
+
+    position.refresh_hash()
+    return position
+
+
+def to_fen(position: Position) -> str:
+    """Строка FEN для позиции"""
+    rows = []
+    for y in range(8):
+        row = ""
+        empty = 0
+        for x in range(8):
+            entry = position.board[y * 8 + x]
+            if entry is None:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            letter = PIECE_LETTERS[entry[1]]
+            row += letter if entry[0] == WHITE else letter.lower()
+        if empty:
+            row += str(empty)
+        rows.append(row)
+
+    castling = "".join(ch for ch, bit in _CASTLING_LETTERS if position.castling & bit) or "-"
+    ep = "-" if position.ep_square is None else square_name(position.ep_square)
+    side = "w" if position.side == WHITE else "b"
+    return (f"{'/'.join(rows)} {side} {castling} {ep} "
+            f"{position.halfmove_clock} {position.fullmove_number}")
@@ -0,0 +1,295 @@
+"""
+Параллельный поиск и пакетные партии на нескольких процессах
+
+Один процесс CPython загружает одно ядро, поэтому работа раздаётся пулу
+процессов. Между процессами позиции передаются в компактном виде — FEN
+и список Zobrist-хешей уже сыгранных позиций, ходы — упакованными int,
+а не объектами фигур интерфейса.
+
+    python -m rules.parallel --fen "<FEN>" --time 5
+    python -m rules.parallel --games 200 --depth 2
+    python -m rules.parallel --games 50 --depth 2 --scaling
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, Optional, Sequence, Tuple
+from .position import Position, move_to_uci
+from .fen import START_FEN, parse_fen, to_fen
+from .result import game_status, result_string
+from .search import Searcher, SearchResult, MAX_PLY
+from .transposition import DEFAULT_SIZE_MB
+
+MAX_GAME_PLIES = 400  # Партия длиннее считается ничьей
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+# Searcher процесса: таблица транспозиций выделяется один раз на процесс
+# пула, а не на каждую задачу; записи прошлых задач вытесняются по возрасту
+_process_searcher: Optional[Searcher] = None
+
+
+def _get_searcher(tt_size_mb: float) -> Searcher:
+    global _process_searcher
+    if _process_searcher is None or _process_searcher.tt_size_mb != tt_size_mb:
+        _process_searcher = Searcher(tt_size_mb)
+    return _process_searcher
+
+
+# === Параллельный поиск одной позиции (разделение корня) ===
+
+def _search_root_part(fen: str, game_history: List[int], root_moves: List[int],
+                      time_limit: Optional[float], max_depth: int,
+                      tt_size_mb: float) -> Tuple[List[SearchResult], SearchResult]:
+    # Выполняется в процессе пула: своя позиция, свой Searcher и своя таблица транспозиций.
+    # Возвращает результаты всех завершённых итераций и итог поиска
+    iterations = []
+    result = _get_searcher(tt_size_mb).search(parse_fen(fen), time_limit, max_depth,
+                                              game_history, on_iteration=iterations.append,
+                                              root_moves=root_moves)
+    return iterations, result
+
+
+def parallel_search(position: Position, time_limit: Optional[float] = 1.0,
+                    max_depth: int = MAX_PLY - 1, game_history: Iterable[int] = (),
+                    workers: Optional[int] = None,
+                    executor: Optional[ProcessPoolExecutor] = None,
+                    tt_size_mb: float = DEFAULT_SIZE_MB) -> SearchResult:
+    """
+    Ищет лучший ход, разделив ходы корня между процессами
+
+    Каждый процесс углубляется по своей части корня независимо. Оценки разной
+    глубины несравнимы, поэтому ход выбирается по лучшей оценке на самой
+    большой глубине, которую завершили все процессы.
+
+    :param executor: Готовый пул процессов (иначе создаётся на время вызова)
+    :param tt_size_mb: Объём таблицы транспозиций каждого процесса в мегабайтах
+    """
+    workers = workers or default_workers()
+    start = time.perf_counter()
+    moves = list(position.generate_legal_moves())
+    if len(moves) <= 1 or workers == 1:
+        return _get_searcher(tt_size_mb).search(position, time_limit, max_depth, game_history)
+
+    # Ходы раздаются по кругу, чтобы взятия и тихие ходы попали ко всем процессам
+    parts = [moves[i::workers] for i in range(workers) if moves[i::workers]]
+    fen = to_fen(position)
+    game_history = list(game_history)
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(len(parts))
+    try:
+        futures = [executor.submit(_search_root_part, fen, game_history, part,
+                                   time_limit, max_depth, tt_size_mb) for part in parts]
+        parts = [future.result() for future in futures]
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+    # Итерации каждой части идут подряд с глубины 1, так что глубина d
+    # части — это её итерация с индексом d - 1
+    depth = min(len(iterations) for iterations, _ in parts)
+    if depth:
+        best = max((iterations[depth - 1] for iterations, _ in parts),
+                   key=lambda result: result.score)
+    else:
+        # Какая-то часть не успела завершить даже первую итерацию
+        best = max((result for _, result in parts), key=lambda result: result.score)
+    best.nodes = sum(result.nodes for _, result in parts)
+    best.elapsed = time.perf_counter() - start
+    return best
+
+
+# === Пакетные партии и анализ ===
+
+class GameRecord:
+    def __init__(self, start_fen: str, moves: List[int], result: str, outcome: Optional[str],
+                 nodes: int):
+        """
+        Итог одной партии движка с самим собой
+
+        :param start_fen: Начальная позиция (после случайного дебюта)
+        :param moves: Ходы партии в упакованном виде
+        :param result: Результат в нотации PGN
+        :param outcome: Исход из rules.result или None, если партия прервана по длине
+        :param nodes: Сколько узлов просмотрел поиск за партию
+        """
+        self.start_fen = start_fen
+        self.moves = moves
+        self.result = result
+        self.outcome = outcome
+        self.nodes = nodes
+
+    def __repr__(self):
+        return f"GameRecord({self.result}, {len(self.moves)} plies, {self.outcome})"
+
+
+def play_game(seed: int, depth: int = 2, random_plies: int = 4,
+              start_fen: str = START_FEN, max_plies: int = MAX_GAME_PLIES,
+              tt_size_mb: float = DEFAULT_SIZE_MB) -> GameRecord:
+    """
+    Партия движка с самим собой на фиксированную глубину
+
+    Первые random_plies ходов выбираются случайно (с зерном seed), чтобы
+    партии пакета не повторяли друг друга.
+    """
+    rng = random.Random(seed)
+    position = parse_fen(start_fen)
+    for _ in range(random_plies):
+        moves = list(position.generate_legal_moves())
+        if not moves:
+            break
+        position.make_move(rng.choice(moves))
+    opening_fen = to_fen(position)
+    position = parse_fen(opening_fen)
+
+    searcher = _get_searcher(tt_size_mb)
+    repetitions = {position.hash: 1}
+    played = []
+    nodes = 0
+    outcome = None
+    while len(played) < max_plies:
+        _, outcome = game_status(position, repetitions[position.hash])
+        if outcome is not None:
+            break
+        history = [key for key, count in repetitions.items() for _ in range(count)]
+        result = searcher.search(position, None, depth, history)
+        nodes += result.nodes
+        position.make_move(result.move)
+        played.append(result.move)
+        repetitions[position.hash] = repetitions.get(position.hash, 0) + 1
+    return GameRecord(opening_fen, played, result_string(position, outcome), outcome, nodes)
+
+
+def _play_game_task(args: Tuple[int, int, int, str, int, float]) -> GameRecord:
+    return play_game(*args)
+
+
+def play_games(count: int, depth: int = 2, workers: Optional[int] = None,
+               random_plies: int = 4, start_fen: str = START_FEN, seed: int = 0,
+               max_plies: int = MAX_GAME_PLIES,
+               tt_size_mb: float = DEFAULT_SIZE_MB) -> List[GameRecord]:
+    """Играет count независимых партий на пуле процессов"""
+    workers = workers or default_workers()
+    tasks = [(seed + i, depth, random_plies, start_fen, max_plies, tt_size_mb)
+             for i in range(count)]
+    if workers == 1:
+        return [_play_game_task(task) for task in tasks]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_play_game_task, tasks,
+                                 chunksize=max(1, count // (workers * 4))))
+
+
+def _analyze_task(args: Tuple[str, Optional[float], int, float]) -> Tuple[str, SearchResult]:
+    fen, time_limit, depth, tt_size_mb = args
+    return fen, _get_searcher(tt_size_mb).search(parse_fen(fen), time_limit, depth)
+
+
+def analyze_positions(fens: Sequence[str], depth: int = 4, time_limit: Optional[float] = None,
+                      workers: Optional[int] = None,
+                      tt_size_mb: float = DEFAULT_SIZE_MB) -> List[Tuple[str, SearchResult]]:
+    """Анализирует позиции пакетом: [(FEN, результат поиска), ...] в исходном порядке"""
+    workers = workers or default_workers()
+    tasks = [(fen, time_limit, depth, tt_size_mb) for fen in fens]
+    if workers == 1:
+        return [_analyze_task(task) for task in tasks]
+    with ProcessPoolExecutor(workers) as executor:
+        return list(executor.map(_analyze_task, tasks,
+                                 chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+# === Замеры ===
+
+class Throughput:
+    def __init__(self, workers: int, games: int, nodes: int, elapsed: float):
+        """Производительность пакета партий на заданном числе процессов"""
+        self.workers = workers
+        self.games = games
+        self.nodes = nodes
+        self.elapsed = elapsed
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def nodes_per_second(self) -> int:
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+
+def measure_games(count: int, depth: int = 2, workers: Optional[int] = None,
+                  seed: int = 0, tt_size_mb: float = DEFAULT_SIZE_MB) -> Throughput:
+    """Играет пакет партий и замеряет игры/с и узлы/с"""
+    workers = workers or default_workers()
+    start = time.perf_counter()
+    records = play_games(count, depth, workers, seed=seed, tt_size_mb=tt_size_mb)
+    elapsed = time.perf_counter() - start
+    return Throughput(workers, len(records), sum(record.nodes for record in records), elapsed)
+
+
+def measure_scaling(count: int, depth: int = 2,
+                    worker_counts: Optional[Iterable[int]] = None,
+                    out=sys.stdout,
+                    tt_size_mb: float = DEFAULT_SIZE_MB) -> List[Tuple[Throughput, float, float]]:
+    """
+    Один и тот же пакет партий на разном числе процессов
+
+    :return: [(замер, ускорение относительно одного процесса, эффективность на процесс), ...]
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, default_workers()})
+    rows = []
+    base = None
+    for workers in worker_counts:
+        measurement = measure_games(count, depth, workers, tt_size_mb=tt_size_mb)
+        if base is None:
+            base = measurement.games_per_second
+        speedup = measurement.games_per_second / base if base else 0.0
+        efficiency = speedup / workers
+        rows.append((measurement, speedup, efficiency))
+        print(f"{workers:>3} workers: {measurement.games_per_second:8.2f} games/s "
+              f"{measurement.nodes_per_second:>9} nps  speedup {speedup:5.2f}  "
+              f"efficiency {efficiency:5.0%}", file=out)
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Параллельный поиск и пакетные партии")
+    parser.add_argument("--fen", help="найти лучший ход в позиции")
+    parser.add_argument("--time", type=float, default=1.0, help="время на поиск позиции, с")
+    parser.add_argument("--games", type=int, default=0, help="сыграть пакет партий")
+    parser.add_argument("--depth", type=int, default=2, help="глубина поиска в партиях пакета")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов")
+    parser.add_argument("--hash", type=float, default=DEFAULT_SIZE_MB,
+                        help="таблица транспозиций каждого процесса, МБ")
+    parser.add_argument("--scaling", action="store_true",
+                        help="замерить масштабирование пакета по числу процессов")
+    args = parser.parse_args(argv)
+
+    if args.fen:
+        result = parallel_search(parse_fen(args.fen), args.time, workers=args.workers,
+                                 tt_size_mb=args.hash)
+        pv = " ".join(move_to_uci(move) for move in result.pv)
+        print(f"bestmove {move_to_uci(result.move)} score {result.score} depth {result.depth} "
+              f"nodes {result.nodes} nps {result.nps} pv {pv}")
+    if args.games:
+        if args.scaling:
+            counts = range(1, args.workers + 1) if args.workers else None
+            measure_scaling(args.games, args.depth, counts, tt_size_mb=args.hash)
+        else:
+            measurement = measure_games(args.games, args.depth, args.workers,
+                                        tt_size_mb=args.hash)
+            print(f"{measurement.games} games in {measurement.elapsed:.2f} s: "
+                  f"{measurement.games_per_second:.2f} games/s, "
+                  f"{measurement.nodes_per_second} nps, {measurement.workers} workers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+perft: подсчёт листьев дерева ходов до заданной глубины
+
+Служит тестом корректности генератора ходов (сверка с эталонными
+значениями) и бенчмарком его скорости.
+
+    python -m rules.perft --depth 4
+    python -m rules.perft --fen "<FEN>" --depth 3 --divide
+    python -m rules.perft --suite --max-nodes 200000
+"""
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+from .position import Position, move_to_uci
+from .fen import START_FEN, parse_fen
+
+# Эталонные позиции: (название, FEN, [(глубина, число листьев), ...])
+REFERENCE_POSITIONS = [
+    ("initial", START_FEN,
+     [(1, 20), (2, 400), (3, 8902), (4, 197281), (5, 4865609)]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [(1, 48), (2, 2039), (3, 97862), (4, 4085603)]),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [(1, 14), (2, 191), (3, 2812), (4, 43238), (5, 674624)]),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [(1, 6), (2, 264), (3, 9467), (4, 422333)]),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [(1, 44), (2, 1486), (3, 62379), (4, 2103487)]),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [(1, 46), (2, 2079), (3, 89890), (4, 3894594)]),
+    ("illegal en passant 1", "3k4/3p4/8/K1P4r/8/8/8/8 b - - 0 1",
+     [(6, 1134888)]),
+    ("illegal en passant 2", "8/8/4k3/8/2p5/8/B2P2K1/8 w - - 0 1",
+     [(6, 1015133)]),
+    ("en passant gives check", "8/8/1k6/2b5/2pP4/8/5K2/8 b - d3 0 1",
+     [(6, 1440467)]),
+    ("short castling gives check", "5k2/8/8/8/8/8/8/4K2R w K - 0 1",
+     [(6, 661072)]),
+    ("long castling gives check", "3k4/8/8/8/8/8/8/R3K3 w Q - 0 1",
+     [(6, 803711)]),
+    ("castling rights", "r3k2r/1b4bq/8/8/8/8/7B/R3K2R w KQkq - 0 1",
+     [(4, 1274206)]),
+    ("castling prevented", "r3k2r/8/3Q4/8/8/5q2/8/R3K2R b KQkq - 0 1",
+     [(4, 1720476)]),
+    ("promote out of check", "2K2r2/4P3/8/8/8/8/8/3k4 w - - 0 1",
+     [(6, 3821001)]),
+    ("discovered check", "8/8/1P2K3/8/2n5/1q6/8/5k2 b - - 0 1",
+     [(5, 1004658)]),
+    ("promote to give check", "4k3/1P6/8/8/8/8/K7/8 w - - 0 1",
+     [(6, 217342)]),
+    ("underpromote to give check", "8/P1k5/K7/8/8/8/8/8 w - - 0 1",
+     [(6, 92683)]),
+    ("self stalemate", "K1k5/8/P7/8/8/8/8/8 w - - 0 1",
+     [(6, 2217)]),
+    ("stalemate and checkmate 1", "8/k1P5/8/1K6/8/8/8/8 w - - 0 1",
+     [(7, 567584)]),
+    ("stalemate and checkmate 2", "8/8/2k5/5q2/5n2/8/5K2/8 b - - 0 1",
+     [(4, 23527)]),
+]
+
+
+def perft(position: Position, depth: int) -> int:
+    """Число листьев дерева легальных ходов глубины depth"""
+    if depth <= 0:
+        return 1
+    moves = list(position.generate_legal_moves())
+    # На последнем уровне достаточно посчитать ходы, не выполняя их
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for move in moves:
+        position.make_move(move)
+        nodes += perft(position, depth - 1)
+        position.unmake_move()
+    return nodes
+
+
+def divide(position: Position, depth: int) -> List[Tuple[str, int]]:
+    """perft с разбивкой по первому ходу: [(ход UCI, число листьев), ...]"""
+    result = []
+    for move in list(position.generate_legal_moves()):
+        position.make_move(move)
+        result.append((move_to_uci(move), perft(position, depth - 1)))
+        position.unmake_move()
+    return result
+
+
+def timed_perft(position: Position, depth: int) -> Tuple[int, float]:
+    """perft с замером времени: (число листьев, секунды)"""
+    start = time.perf_counter()
+    nodes = perft(position, depth)
+    return nodes, time.perf_counter() - start
+
+
+def run_suite(max_nodes: Optional[int] = 1_000_000, out=sys.stdout) -> bool:
+    """
+    Сверяет perft с эталонными позициями
+
+    :param max_nodes: Пропускать глубины с большим числом листьев (None — без ограничений)
+    :return: True, если все посчитанные значения совпали
+    """
+    ok = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        for depth, nodes in expected:
+            if max_nodes is not None and nodes > max_nodes:
+                continue
+            got, elapsed = timed_perft(parse_fen(fen), depth)
+            total_nodes += got
+            total_time += elapsed
+            status = "ok" if got == nodes else "FAIL"
+            ok = ok and got == nodes
+            print(f"{status:4} {name:28} depth {depth}: {got:>9} "
+                  f"(expected {nodes}) {_nps(got, elapsed):>8} nps", file=out)
+    print(f"total {total_nodes} nodes in {total_time:.2f} s, "
+          f"{_nps(total_nodes, total_time)} nps", file=out)
+    return ok
+
+
+def _nps(nodes: int, seconds: float) -> int:
+    return int(nodes / seconds) if seconds > 0 else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="perft для генератора ходов")
+    parser.add_argument("--fen", default=START_FEN, help="позиция (по умолчанию начальная)")
+    parser.add_argument("--depth", type=int, default=4, help="глубина")
+    parser.add_argument("--divide", action="store_true", help="разбивка по первому ходу")
+    parser.add_argument("--suite", action="store_true", help="сверка с эталонными позициями")
+    parser.add_argument("--max-nodes", type=int, default=1_000_000,
+                        help="пропускать в --suite проверки крупнее (0 — без ограничений)")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return 0 if run_suite(args.max_nodes or None) else 1
+
+    position = parse_fen(args.fen)
+    start = time.perf_counter()
+    if args.divide:
+        nodes = 0
+        for uci, count in divide(position, args.depth):
+            print(f"{uci}: {count}")
+            nodes += count
+    else:
+        nodes = perft(position, args.depth)
+    elapsed = time.perf_counter() - start
+    print(f"nodes {nodes} time {elapsed:.3f} s nps {_nps(nodes, elapsed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
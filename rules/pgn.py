@@ -0,0 +1,247 @@
+"""
+Чтение и запись партий в формате PGN
+
+Чтение потоковое: read_games разбирает файл построчно и отдаёт партии по
+одной, так что архив любого размера обрабатывается в постоянной памяти.
+
+    python -m rules.pgn games.pgn
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import date
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from .position import Position, WHITE
+from .fen import START_FEN, parse_fen
+from .san import move_to_san, parse_san
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+
+# Обязательные теги PGN в обязательном порядке
+SEVEN_TAG_ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+LINE_WIDTH = 80
+
+_TAG_RE = re.compile(r'^\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_WORD_RE = re.compile(r"[^\s{}();]+")
+_MOVE_NUMBER_RE = re.compile(r"^\d+\.*")
+
+
+class PgnGame:
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 moves: Optional[List[str]] = None, result: str = "*"):
+        """
+        Партия из PGN: теги, ходы в SAN и результат
+
+        :param headers: Теги партии в порядке появления
+        :param moves: Ходы основного варианта (без комментариев и вариантов)
+        :param result: Результат из завершающего токена партии
+        """
+        self.headers = headers if headers is not None else {}
+        self.moves = moves if moves is not None else []
+        self.result = result
+
+    @property
+    def start_fen(self) -> str:
+        """Начальная позиция: тег FEN или обычная начальная расстановка"""
+        return self.headers.get("FEN", START_FEN)
+
+    def __repr__(self):
+        return f"PgnGame({self.headers.get('White', '?')} - {self.headers.get('Black', '?')}, " \
+               f"{len(self.moves)} plies, {self.result})"
+
+
+# === Чтение ===
+
+def read_games(stream: TextIO) -> Iterator[PgnGame]:
+    """
+    Генератор партий из текстового потока PGN
+
+    Комментарии, варианты, NAG и номера ходов пропускаются. В памяти
+    держится только текущая партия.
+    """
+    game = PgnGame()
+    has_movetext = False
+    in_comment = False
+    variation_depth = 0
+
+    for line in stream:
+        start = 0
+        if in_comment:
+            end = line.find("}")
+            if end < 0:
+                continue
+            in_comment = False
+            start = end + 1
+        elif line.startswith("%"):
+            continue
+        elif line.startswith("[") and not variation_depth:
+            match = _TAG_RE.match(line)
+            if match:
+                # Теги после ходов без результата — значит, началась следующая партия
+                if has_movetext:
+                    yield game
+                    game = PgnGame()
+                    has_movetext = False
+                game.headers[match.group(1)] = match.group(2).replace('\\"', '"').replace("\\\\", "\\")
+                continue
+
+        i = start
+        length = len(line)
+        while i < length:
+            ch = line[i]
+            if ch.isspace():
+                i += 1
+            elif ch == "{":
+                end = line.find("}", i + 1)
+                if end < 0:
+                    in_comment = True
+                    break
+                i = end + 1
+            elif ch == ";":
+                break
+            elif ch == "(":
+                variation_depth += 1
+                i += 1
+            elif ch == ")":
+                variation_depth = max(0, variation_depth - 1)
+                i += 1
+            else:
+                match = _WORD_RE.match(line, i)
+                if match is None:
+                    i += 1
+                    continue
+                i = match.end()
+                if variation_depth:
+                    continue
+                word = match.group()
+                if word in RESULTS:
+                    game.result = word
+                    yield game
+                    game = PgnGame()
+                    has_movetext = False
+                    continue
+                word = _MOVE_NUMBER_RE.sub("", word)
+                if word and not word.startswith("$"):
+                    game.moves.append(word)
+                has_movetext = True
+
+    if has_movetext or game.headers:
+        yield game
+
+
+def replay(game: PgnGame) -> Tuple[Position, List[int]]:
+    """
+    Проигрывает партию через ядро правил
+
+    :return: Конечная позиция и ходы в упакованном виде
+    :raises ValueError: если позиция или ход некорректны
+    """
+    position = parse_fen(game.start_fen)
+    moves = []
+    for ply, san in enumerate(game.moves):
+        try:
+            move = parse_san(position, san)
+        except ValueError as error:
+            raise ValueError(f"Ply {ply + 1}: {error}") from None
+        position.make_move(move)
+        moves.append(move)
+    return position, moves
+
+
+# === Запись ===
+
+def export_pgn(moves: List[int], headers: Optional[Dict[str, str]] = None,
+               start_fen: str = START_FEN, result: str = "*") -> str:
+    """
+    Текст PGN для партии из упакованных ходов
+
+    Ходы записываются в SAN с уточнениями и знаками шаха и мата.
+    Недостающие обязательные теги заполняются значениями по умолчанию.
+    """
+    tags = {"Event": "?", "Site": "?", "Date": date.today().strftime("%Y.%m.%d"),
+            "Round": "?", "White": "?", "Black": "?"}
+    tags.update(headers or {})
+    tags["Result"] = result
+    if start_fen != START_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = start_fen
+
+    lines = []
+    for name in SEVEN_TAG_ROSTER:
+        lines.append(_format_tag(name, tags[name]))
+    for name, value in tags.items():
+        if name not in SEVEN_TAG_ROSTER:
+            lines.append(_format_tag(name, value))
+    lines.append("")
+
+    position = parse_fen(start_fen)
+    tokens = []
+    for index, move in enumerate(moves):
+        if position.side == WHITE:
+            tokens.append(f"{position.fullmove_number}.")
+        elif not index:
+            tokens.append(f"{position.fullmove_number}...")
+        tokens.append(move_to_san(position, move))
+        position.make_move(move)
+    tokens.append(result)
+
+    line = ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > LINE_WIDTH:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def _format_tag(name: str, value: str) -> str:
+    value = value.replace("\\", "\\\\").replace('"', '\\"')
+    return f'[{name} "{value}"]'
+
+
+# === Массовое проигрывание ===
+
+def replay_file(path: str, out=sys.stdout) -> Dict[str, int]:
+    """
+    Проигрывает все партии файла и печатает статистику
+
+    :return: Счётчики: партии, полуходы, ошибки и результаты
+    """
+    stats = {"games": 0, "plies": 0, "errors": 0}
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", errors="replace") as stream:
+        for game in read_games(stream):
+            stats["games"] += 1
+            try:
+                _, moves = replay(game)
+            except ValueError as error:
+                stats["errors"] += 1
+                print(f"game {stats['games']}: {error}", file=out)
+                continue
+            stats["plies"] += len(moves)
+            stats[game.result] = stats.get(game.result, 0) + 1
+    elapsed = time.perf_counter() - start
+    rate = stats["plies"] / elapsed if elapsed > 0 else 0
+    print(f"{stats['games']} games, {stats['plies']} plies, {stats['errors']} errors "
+          f"in {elapsed:.2f} s ({rate:.0f} plies/s)", file=out)
+    print("results: " + ", ".join(f"{result} {stats.get(result, 0)}" for result in RESULTS),
+          file=out)
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Проигрывание партий из PGN через ядро правил")
+    parser.add_argument("files", nargs="+", help="файлы PGN")
+    args = parser.parse_args(argv)
+    errors = 0
+    for path in args.files:
+        errors += replay_file(path)["errors"]
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
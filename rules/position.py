@@ -0,0 +1,678 @@
+from typing import List, Optional, Tuple
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EP_FILE_KEYS
+from .psqt import PSQ
+
+# Цвета и типы фигур в битбордовом представлении
+WHITE = 0
+BLACK = 1
+
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+PIECE_LETTERS = "PNBRQK"
+
+FULL = (1 << 64) - 1
+
+# Флаги хода
+CAPTURE = 1
+DOUBLE_PUSH = 2
+EN_PASSANT = 4
+CASTLING = 8
+
+# Права на рокировку
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+
+# Клетки нумеруются так же, как тайлы доски: индекс = y * 8 + x,
+# то есть 0 — это a8 (левый верхний угол), 63 — h1
+WHITE_KING_HOME = 60
+BLACK_KING_HOME = 4
+
+
+def square_index(pos: Tuple[int, int]) -> int:
+    """Переводит координаты (x, y) в индекс клетки 0-63"""
+    return pos[1] * 8 + pos[0]
+
+
+# (x, y) каждой клетки: готовые кортежи вместо нового на каждое обращение
+SQUARE_POSITIONS = tuple((sq & 7, sq >> 3) for sq in range(64))
+
+
+def square_pos(sq: int) -> Tuple[int, int]:
+    """Переводит индекс клетки 0-63 в координаты (x, y)"""
+    return SQUARE_POSITIONS[sq]
+
+
+def square_name(sq: int) -> str:
+    """Имя клетки в алгебраической нотации: 0 -> a8, 63 -> h1"""
+    return "abcdefgh"[sq & 7] + str(8 - (sq >> 3))
+
+
+def parse_square(name: str) -> int:
+    """Индекс клетки по имени в алгебраической нотации"""
+    if len(name) != 2 or name[0] not in "abcdefgh" or name[1] not in "12345678":
+        raise ValueError(f"Invalid square: {name!r}")
+    return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+def encode_move(from_sq: int, to_sq: int, promotion: int = 0, flags: int = 0) -> int:
+    """Упаковывает ход в целое число: откуда, куда, превращение, флаги"""
+    return from_sq | (to_sq << 6) | (promotion << 12) | (flags << 15)
+
+
+def move_from(move: int) -> int:
+    return move & 63
+
+
+def move_to(move: int) -> int:
+    return (move >> 6) & 63
+
+
+def move_promotion(move: int) -> int:
+    return (move >> 12) & 7
+
+
+def move_flags(move: int) -> int:
+    return move >> 15
+
+
+def move_to_uci(move: int) -> str:
+    """Ход в формате UCI: e2e4, e7e8q"""
+    promotion = (move >> 12) & 7
+    uci = square_name(move & 63) + square_name((move >> 6) & 63)
+    return uci + PIECE_LETTERS[promotion].lower() if promotion else uci
+
+
+def iter_bits(bb: int):
+    """Перебирает индексы установленных битов битборда"""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def popcount(bb: int) -> int:
+    return bin(bb).count("1")
+
+
+def _step_table(deltas) -> List[int]:
+    """Таблица атак для фигур, ходящих на фиксированные смещения"""
+    table = []
+    for sq in range(64):
+        x, y = sq & 7, sq >> 3
+        bb = 0
+        for dx, dy in deltas:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < 8 and 0 <= ny < 8:
+                bb |= 1 << (ny * 8 + nx)
+        table.append(bb)
+    return table
+
+
+def _ray_table(dx: int, dy: int) -> List[int]:
+    """Луч от каждой клетки в заданном направлении до края доски"""
+    table = []
+    for sq in range(64):
+        x, y = (sq & 7) + dx, (sq >> 3) + dy
+        bb = 0
+        while 0 <= x < 8 and 0 <= y < 8:
+            bb |= 1 << (y * 8 + x)
+            x += dx
+            y += dy
+        table.append(bb)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table([(1, 2), (2, 1), (2, -1), (1, -2),
+                              (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_table([(1, 0), (1, 1), (0, 1), (-1, 1),
+                            (-1, 0), (-1, -1), (0, -1), (1, -1)])
+# Белые пешки идут вверх (y уменьшается), чёрные — вниз
+PAWN_ATTACKS = [_step_table([(-1, -1), (1, -1)]),
+                _step_table([(-1, 1), (1, 1)])]
+
+# Лучи: (таблица, растёт ли индекс клетки вдоль луча)
+ROOK_RAYS = [(_ray_table(dx, dy), dy > 0 or (dy == 0 and dx > 0))
+             for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]]
+BISHOP_RAYS = [(_ray_table(dx, dy), dy > 0)
+               for dx, dy in [(1, 1), (-1, -1), (-1, 1), (1, -1)]]
+
+
+def _line_tables():
+    """Клетки строго между двумя клетками и вся линия через них"""
+    between = [[0] * 64 for _ in range(64)]
+    line = [[0] * 64 for _ in range(64)]
+    for rays in (ROOK_RAYS, BISHOP_RAYS):
+        # Лучи идут парами противоположных направлений
+        for i, (ray, _) in enumerate(rays):
+            opposite = rays[i ^ 1][0]
+            for a in range(64):
+                full = ray[a] | opposite[a] | (1 << a)
+                for b in iter_bits(ray[a]):
+                    between[a][b] = ray[a] & ~ray[b] & ~(1 << b)
+                    line[a][b] = full
+    return between, line
+
+
+BETWEEN, LINE = _line_tables()
+
+# Маска прав на рокировку, которые сохраняются после хода с/на клетку
+CASTLING_MASK = [15] * 64
+CASTLING_MASK[WHITE_KING_HOME] &= ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASK[63] &= ~WHITE_KINGSIDE
+CASTLING_MASK[56] &= ~WHITE_QUEENSIDE
+CASTLING_MASK[BLACK_KING_HOME] &= ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASK[7] &= ~BLACK_KINGSIDE
+CASTLING_MASK[0] &= ~BLACK_QUEENSIDE
+
+# Крайние горизонтали, на которых пешка превращается
+PROMOTION_RANKS = 0xFF | (0xFF << 56)
+PROMOTION_PIECES = (QUEEN, ROOK, BISHOP, KNIGHT)
+
+# Общие кортежи (цвет, тип) для Position.board, чтобы не создавать их на каждый ход
+PIECE_ENTRIES = tuple(tuple((color, kind) for kind in range(6)) for color in (WHITE, BLACK))
+
+# Ладья при рокировке: клетка назначения короля -> (откуда, куда)
+CASTLING_ROOK = {62: (63, 61), 58: (56, 59), 6: (7, 5), 2: (0, 3)}
+
+
+def _slide(sq: int, occupied: int, rays) -> int:
+    attacks = 0
+    for ray, positive in rays:
+        line = ray[sq]
+        blockers = line & occupied
+        if blockers:
+            if positive:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            line ^= ray[blocker]
+        attacks |= line
+    return attacks
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    """Атаки ладьи с клетки sq с учётом блокирующих фигур"""
+    return _slide(sq, occupied, ROOK_RAYS)
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    """Атаки слона с клетки sq с учётом блокирующих фигур"""
+    return _slide(sq, occupied, BISHOP_RAYS)
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    return _slide(sq, occupied, ROOK_RAYS) | _slide(sq, occupied, BISHOP_RAYS)
+
+
+class Position:
+    __slots__ = ("pieces", "occupancy", "board", "side", "castling", "ep_square",
+                 "halfmove_clock", "fullmove_number", "hash", "pawn_hash", "psq", "_history",
+                 "_attacks", "_danger", "_checkers", "_pinned")
+
+    def __init__(self):
+        """
+        Позиция на битбордах без зависимости от pygame
+
+        Хранит по битборду на каждый тип фигуры каждого цвета,
+        занятость по цветам и массив клеток для быстрого ответа,
+        какая фигура стоит на клетке.
+        """
+        self.clear()
+
+    def clear(self):
+        """Очищает доску и состояние позиции"""
+        self.pieces = [[0] * 6, [0] * 6]  # pieces[цвет][тип] -> битборд
+        self.occupancy = [0, 0]
+        self.board: List[Optional[Tuple[int, int]]] = [None] * 64
+        self.side = WHITE
+        self.castling = 0
+        self.ep_square: Optional[int] = None  # Клетка за пешкой, сделавшей двойной ход
+        self.halfmove_clock = 0
+        self.fullmove_number = 1
+        self.hash = 0  # Zobrist-хеш, обновляется инкрементально в make_move
+        self.pawn_hash = 0  # Zobrist-ключ только пешек (для пешечной таблицы оценки)
+        # Материал и PST (белые минус чёрные), упакованные psqt.pack — тоже инкрементально
+        self.psq = 0
+        self._history = []
+        self._invalidate()
+
+    def copy(self) -> "Position":
+        """Независимая копия позиции (вместе с историей для unmake_move)"""
+        other = Position.__new__(Position)
+        other.pieces = [self.pieces[WHITE][:], self.pieces[BLACK][:]]
+        other.occupancy = self.occupancy[:]
+        other.board = self.board[:]
+        other.side = self.side
+        other.castling = self.castling
+        other.ep_square = self.ep_square
+        other.halfmove_clock = self.halfmove_clock
+        other.fullmove_number = self.fullmove_number
+        other.hash = self.hash
+        other.pawn_hash = self.pawn_hash
+        other.psq = self.psq
+        other._history = self._history[:]
+        other._attacks = self._attacks[:]
+        other._danger = self._danger[:]
+        other._checkers = self._checkers[:]
+        other._pinned = self._pinned[:]
+        return other
+
+    def _invalidate(self):
+        # Карты атак, шахующие и связанные фигуры считаются лениво один раз
+        # на позицию; make_move откладывает их в историю, unmake_move возвращает
+        self._attacks = [None, None]
+        self._danger = [None, None]
+        self._checkers = [None, None]
+        self._pinned = [None, None]
+
+    def put(self, sq: int, color: int, kind: int):
+        """Ставит фигуру на клетку"""
+        self._put(sq, color, kind)
+        self._invalidate()
+
+    def remove(self, sq: int):
+        """Убирает фигуру с клетки"""
+        self._remove(sq)
+        self._invalidate()
+
+    def _put(self, sq: int, color: int, kind: int):
+        bit = 1 << sq
+        self.pieces[color][kind] |= bit
+        self.occupancy[color] |= bit
+        self.board[sq] = PIECE_ENTRIES[color][kind]
+        self.hash ^= PIECE_KEYS[color][kind][sq]
+        self.psq += PSQ[color][kind][sq]
+        if kind == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[color][PAWN][sq]
+
+    def _remove(self, sq: int):
+        color, kind = self.board[sq]
+        mask = ~(1 << sq)
+        self.pieces[color][kind] &= mask
+        self.occupancy[color] &= mask
+        self.board[sq] = None
+        self.hash ^= PIECE_KEYS[color][kind][sq]
+        self.psq -= PSQ[color][kind][sq]
+        if kind == PAWN:
+            self.pawn_hash ^= PIECE_KEYS[color][PAWN][sq]
+
+    def piece_at(self, sq: int) -> Optional[Tuple[int, int]]:
+        return self.board[sq]
+
+    @property
+    def occupied(self) -> int:
+        return self.occupancy[WHITE] | self.occupancy[BLACK]
+
+    def key(self) -> int:
+        """Ключ позиции для кэшей и таблицы повторений"""
+        return self.hash
+
+    def _ep_key(self) -> int:
+        # Вертикаль взятия на проходе входит в хеш, только если взять действительно есть чем
+        ep = self.ep_square
+        if ep is not None and PAWN_ATTACKS[self.side ^ 1][ep] & self.pieces[self.side][PAWN]:
+            return EP_FILE_KEYS[ep & 7]
+        return 0
+
+    def compute_hash(self) -> int:
+        """Считает Zobrist-хеш позиции с нуля"""
+        h = 0
+        for sq, entry in enumerate(self.board):
+            if entry is not None:
+                h ^= PIECE_KEYS[entry[0]][entry[1]][sq]
+        if self.side == BLACK:
+            h ^= SIDE_KEY
+        return h ^ CASTLING_KEYS[self.castling] ^ self._ep_key()
+
+    def compute_pawn_hash(self) -> int:
+        """Считает Zobrist-ключ пешек с нуля"""
+        h = 0
+        for color in (WHITE, BLACK):
+            keys = PIECE_KEYS[color][PAWN]
+            for sq in iter_bits(self.pieces[color][PAWN]):
+                h ^= keys[sq]
+        return h
+
+    def refresh_hash(self):
+        """Пересчитывает хеш после ручной расстановки (put/remove, смена side, castling, ep_square)"""
+        self.hash = self.compute_hash()
+        self.pawn_hash = self.compute_pawn_hash()
+
+    def king_square(self, color: int) -> Optional[int]:
+        bb = self.pieces[color][KING]
+        return bb.bit_length() - 1 if bb else None
+
+    # === Атаки ===
+
+    def attackers_to(self, sq: int, color: int, occupied: Optional[int] = None) -> int:
+        """Битборд фигур цвета color, атакующих клетку sq"""
+        if occupied is None:
+            occupied = self.occupied
+        own = self.pieces[color]
+        return ((PAWN_ATTACKS[color ^ 1][sq] & own[PAWN])
+                | (KNIGHT_ATTACKS[sq] & own[KNIGHT])
+                | (KING_ATTACKS[sq] & own[KING])
+                | (bishop_attacks(sq, occupied) & (own[BISHOP] | own[QUEEN]))
+                | (rook_attacks(sq, occupied) & (own[ROOK] | own[QUEEN])))
+
+    def is_attacked(self, sq: int, color: int) -> bool:
+        """Атакована ли клетка sq фигурами цвета color"""
+        own = self.pieces[color]
+        if PAWN_ATTACKS[color ^ 1][sq] & own[PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & own[KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & own[KING]:
+            return True
+        occupied = self.occupied
+        if bishop_attacks(sq, occupied) & (own[BISHOP] | own[QUEEN]):
+            return True
+        return bool(rook_attacks(sq, occupied) & (own[ROOK] | own[QUEEN]))
+
+    def _compute_attacks(self, color: int, occupied: int) -> int:
+        own = self.pieces[color]
+        attacks = 0
+        for sq in iter_bits(own[PAWN]):
+            attacks |= PAWN_ATTACKS[color][sq]
+        for sq in iter_bits(own[KNIGHT]):
+            attacks |= KNIGHT_ATTACKS[sq]
+        for sq in iter_bits(own[KING]):
+            attacks |= KING_ATTACKS[sq]
+        for sq in iter_bits(own[BISHOP] | own[QUEEN]):
+            attacks |= bishop_attacks(sq, occupied)
+        for sq in iter_bits(own[ROOK] | own[QUEEN]):
+            attacks |= rook_attacks(sq, occupied)
+        return attacks
+
+    def attack_map(self, color: int) -> int:
+        """Битборд всех клеток, атакованных фигурами цвета color"""
+        attacks = self._attacks[color]
+        if attacks is None:
+            attacks = self._attacks[color] = self._compute_attacks(color, self.occupied)
+        return attacks
+
+    def king_danger(self, color: int) -> int:
+        """
+        Клетки, атакованные соперником, если убрать с доски короля цвета color
+
+        Король не может уйти на такую клетку, в том числе отступить вдоль линии шаха
+        """
+        danger = self._danger[color]
+        if danger is None:
+            occupied = self.occupied & ~self.pieces[color][KING]
+            danger = self._danger[color] = self._compute_attacks(color ^ 1, occupied)
+        return danger
+
+    def checkers(self, color: Optional[int] = None) -> int:
+        """Битборд фигур соперника, объявивших шах королю цвета color"""
+        if color is None:
+            color = self.side
+        checkers = self._checkers[color]
+        if checkers is None:
+            king_sq = self.king_square(color)
+            checkers = 0 if king_sq is None else self.attackers_to(king_sq, color ^ 1)
+            self._checkers[color] = checkers
+        return checkers
+
+    def pinned(self, color: Optional[int] = None) -> int:
+        """Битборд фигур цвета color, связанных со своим королём"""
+        if color is None:
+            color = self.side
+        pinned = self._pinned[color]
+        if pinned is None:
+            pinned = 0
+            king_sq = self.king_square(color)
+            if king_sq is not None:
+                enemy = self.pieces[color ^ 1]
+                occupied = self.occupied
+                snipers = ((rook_attacks(king_sq, 0) & (enemy[ROOK] | enemy[QUEEN]))
+                           | (bishop_attacks(king_sq, 0) & (enemy[BISHOP] | enemy[QUEEN])))
+                for sq in iter_bits(snipers):
+                    blockers = BETWEEN[king_sq][sq] & occupied
+                    # Ровно одна фигура между королём и дальнобойной фигурой
+                    if blockers and not blockers & (blockers - 1):
+                        pinned |= blockers & self.occupancy[color]
+            self._pinned[color] = pinned
+        return pinned
+
+    def in_check(self, color: Optional[int] = None) -> bool:
+        """Находится ли король цвета color (по умолчанию — стороны на ходу) под шахом"""
+        return bool(self.checkers(color))
+
+    # === Возможные ходы фигур (без учёта шаха своему королю) ===
+
+    def pawn_targets(self, sq: int, color: int) -> int:
+        empty = ~self.occupied & FULL
+        if color == WHITE:
+            one = (1 << (sq - 8)) & empty if sq >= 8 else 0
+            two = (one >> 8) & empty if one and sq >> 3 == 6 else 0
+        else:
+            one = (1 << (sq + 8)) & empty if sq < 56 else 0
+            two = (one << 8) & empty if one and sq >> 3 == 1 else 0
+        captures = self.occupancy[color ^ 1]
+        # Взять на проходе может только сторона на ходу
+        if self.ep_square is not None and color == self.side:
+            captures |= 1 << self.ep_square
+        return one | two | (PAWN_ATTACKS[color][sq] & captures)
+
+    def knight_targets(self, sq: int, color: int) -> int:
+        return KNIGHT_ATTACKS[sq] & ~self.occupancy[color]
+
+    def bishop_targets(self, sq: int, color: int) -> int:
+        return bishop_attacks(sq, self.occupied) & ~self.occupancy[color]
+
+    def rook_targets(self, sq: int, color: int) -> int:
+        return rook_attacks(sq, self.occupied) & ~self.occupancy[color]
+
+    def queen_targets(self, sq: int, color: int) -> int:
+        return queen_attacks(sq, self.occupied) & ~self.occupancy[color]
+
+    def king_targets(self, sq: int, color: int) -> int:
+        return (KING_ATTACKS[sq] & ~self.occupancy[color]) | self.castling_targets(color)
+
+    def castling_targets(self, color: int) -> int:
+        """Клетки, на которые король может встать рокировкой"""
+        home = WHITE_KING_HOME if color == WHITE else BLACK_KING_HOME
+        kingside = WHITE_KINGSIDE if color == WHITE else BLACK_KINGSIDE
+        queenside = WHITE_QUEENSIDE if color == WHITE else BLACK_QUEENSIDE
+        if not self.castling & (kingside | queenside):
+            return 0
+        if not self.pieces[color][KING] & (1 << home):
+            return 0
+        danger = self.attack_map(color ^ 1)
+        if danger >> home & 1:
+            return 0
+
+        occupied = self.occupied
+        targets = 0
+        # Короткая: f и g свободны и не под атакой
+        if (self.castling & kingside
+                and self.board[home + 3] == (color, ROOK)
+                and not occupied & (0b11 << (home + 1))
+                and not danger & (0b11 << (home + 1))):
+            targets |= 1 << (home + 2)
+        # Длинная: b, c и d свободны, c и d не под атакой
+        if (self.castling & queenside
+                and self.board[home - 4] == (color, ROOK)
+                and not occupied & (0b111 << (home - 3))
+                and not danger & (0b11 << (home - 2))):
+            targets |= 1 << (home - 2)
+        return targets
+
+    def piece_targets(self, sq: int) -> int:
+        """Битборд клеток, куда может пойти фигура с клетки sq"""
+        entry = self.board[sq]
+        if entry is None:
+            return 0
+        color, kind = entry
+        if kind == PAWN:
+            return self.pawn_targets(sq, color)
+        if kind == KNIGHT:
+            return self.knight_targets(sq, color)
+        if kind == BISHOP:
+            return self.bishop_targets(sq, color)
+        if kind == ROOK:
+            return self.rook_targets(sq, color)
+        if kind == QUEEN:
+            return self.queen_targets(sq, color)
+        return self.king_targets(sq, color)
+
+    # === Выполнение и отмена ходов ===
+
+    def build_move(self, from_sq: int, to_sq: int, promotion: int = 0) -> int:
+        """Собирает ход с флагами, определёнными по текущей позиции"""
+        color, kind = self.board[from_sq]
+        flags = CAPTURE if self.board[to_sq] is not None else 0
+        if kind == PAWN:
+            if abs(to_sq - from_sq) == 16:
+                flags |= DOUBLE_PUSH
+            elif to_sq == self.ep_square and (to_sq - from_sq) & 7:
+                flags |= EN_PASSANT | CAPTURE
+        elif kind == KING and abs(to_sq - from_sq) == 2:
+            flags |= CASTLING
+        return encode_move(from_sq, to_sq, promotion, flags)
+
+    def moves_from(self, from_sq: int, targets: int):
+        """Генератор упакованных ходов с клетки from_sq на клетки битборда targets"""
+        build_move = self.build_move
+        if self.board[from_sq][1] == PAWN and targets & PROMOTION_RANKS:
+            for to_sq in iter_bits(targets):
+                move = build_move(from_sq, to_sq)
+                if (1 << to_sq) & PROMOTION_RANKS:
+                    for promotion in PROMOTION_PIECES:
+                        yield move | (promotion << 12)
+                else:
+                    yield move
+        else:
+            for to_sq in iter_bits(targets):
+                yield build_move(from_sq, to_sq)
+
+    def generate_moves(self, color: Optional[int] = None):
+        """Генератор псевдолегальных ходов стороны color (по умолчанию — стороны на ходу)"""
+        if color is None:
+            color = self.side
+        for sq in iter_bits(self.occupancy[color]):
+            yield from self.moves_from(sq, self.piece_targets(sq))
+
+    def generate_legal_moves(self, color: Optional[int] = None):
+        """Генератор легальных ходов стороны color"""
+        is_legal = self.is_legal
+        for move in self.generate_moves(color):
+            if is_legal(move):
+                yield move
+
+    def has_legal_moves(self, color: Optional[int] = None) -> bool:
+        return next(self.generate_legal_moves(color), None) is not None
+
+    def make_move(self, move: int):
+        """Выполняет ход (легальность не проверяется)"""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flags = move >> 15
+        color, kind = self.board[from_sq]
+        captured = self.board[to_sq]
+
+        self._history.append((move, captured, self.castling, self.ep_square,
+                              self.halfmove_clock, self.hash,
+                              (self._attacks, self._danger, self._checkers, self._pinned)))
+        self._invalidate()
+        self.hash ^= CASTLING_KEYS[self.castling] ^ self._ep_key() ^ SIDE_KEY
+
+        if flags & EN_PASSANT:
+            self._remove(to_sq + 8 if color == WHITE else to_sq - 8)
+        elif captured is not None:
+            self._remove(to_sq)
+
+        self._remove(from_sq)
+        self._put(to_sq, color, promotion or kind)
+
+        if flags & CASTLING:
+            rook_from, rook_to = CASTLING_ROOK[to_sq]
+            self._remove(rook_from)
+            self._put(rook_to, color, ROOK)
+
+        self.castling &= CASTLING_MASK[from_sq] & CASTLING_MASK[to_sq]
+        self.ep_square = (from_sq + to_sq) // 2 if flags & DOUBLE_PUSH else None
+
+        if kind == PAWN or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        if color == BLACK:
+            self.fullmove_number += 1
+        self.side = color ^ 1
+        self.hash ^= CASTLING_KEYS[self.castling] ^ self._ep_key()
+
+    def unmake_move(self):
+        """Отменяет последний ход, сделанный через make_move"""
+        move, captured, castling, ep_square, halfmove_clock, h, cache = self._history.pop()
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        promotion = (move >> 12) & 7
+        flags = move >> 15
+        color = self.side ^ 1
+        kind = PAWN if promotion else self.board[to_sq][1]
+
+        if flags & CASTLING:
+            rook_from, rook_to = CASTLING_ROOK[to_sq]
+            self._remove(rook_to)
+            self._put(rook_from, color, ROOK)
+
+        self._remove(to_sq)
+        self._put(from_sq, color, kind)
+
+        if flags & EN_PASSANT:
+            self._put(to_sq + 8 if color == WHITE else to_sq - 8, color ^ 1, PAWN)
+        elif captured is not None:
+            self._put(to_sq, captured[0], captured[1])
+
+        self.castling = castling
+        self.ep_square = ep_square
+        self.halfmove_clock = halfmove_clock
+        self._attacks, self._danger, self._checkers, self._pinned = cache
+        self.hash = h
+        if color == BLACK:
+            self.fullmove_number -= 1
+        self.side = color
+
+    def is_legal(self, move: int) -> bool:
+        """Не оставляет ли ход своего короля под шахом"""
+        from_sq = move & 63
+        to_sq = (move >> 6) & 63
+        flags = move >> 15
+        color, kind = self.board[from_sq]
+
+        if kind == KING:
+            # Поля рокировки уже проверены в castling_targets
+            return bool(flags & CASTLING) or not self.king_danger(color) >> to_sq & 1
+
+        if not flags & EN_PASSANT:
+            king_sq = self.king_square(color)
+            if king_sq is None:
+                return True
+            checkers = self.checkers(color)
+            if checkers:
+                # От двойного шаха спасает только ход короля
+                if checkers & (checkers - 1):
+                    return False
+                # Нужно взять шахующую фигуру или закрыться от неё
+                checker_sq = checkers.bit_length() - 1
+                if not ((1 << to_sq) & (checkers | BETWEEN[king_sq][checker_sq])):
+                    return False
+            # Связанная фигура может ходить только вдоль линии связки
+            if self.pinned(color) >> from_sq & 1:
+                return bool(LINE[king_sq][from_sq] >> to_sq & 1)
+            return True
+
+        # Взятие на проходе убирает сразу две фигуры с линии — проверяем честно
+        self.make_move(move)
+        legal = not self.in_check(color)
+        self.unmake_move()
+        return legal
+
+    def legal_targets(self, sq: int) -> List[int]:
+        """Список клеток, куда фигура с клетки sq может пойти легально"""
+        return [to_sq for to_sq in iter_bits(self.piece_targets(sq))
+                if self.is_legal(self.build_move(sq, to_sq))]
@@ -0,0 +1,135 @@
+"""
+Стоимость фигур и позиционные таблицы (PST) для миттельшпиля и эндшпиля
+
+Таблицы записаны для белых: индекс 0 — a8, 63 — h1. Для чёрных клетка
+отражается по горизонтали (sq ^ 56). Оценки миттельшпиля и эндшпиля
+упакованы в одно целое (pack), и Position прибавляет его при каждой
+расстановке и снятии фигуры: материал и позиционная оценка всегда готовы
+без пересчёта, а на ход тратится одно сложение.
+"""
+
+# Стоимость фигур: пешка, конь, слон, ладья, ферзь, король
+MG_VALUES = (82, 337, 365, 477, 1025, 0)
+EG_VALUES = (94, 281, 297, 512, 936, 0)
+
+# Вклад фигур в фазу партии: 24 — все фигуры на доске, 0 — чистый эндшпиль
+PHASE_WEIGHTS = (0, 1, 1, 2, 4, 0)
+MAX_PHASE = 24
+
+_PAWN_MG = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+_PAWN_EG = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    80, 80, 80, 80, 80, 80, 80, 80,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    30, 30, 30, 30, 30, 30, 30, 30,
+    15, 15, 15, 15, 15, 15, 15, 15,
+    5, 5, 5, 5, 5, 5, 5, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0,
+)
+_KNIGHT = (
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+)
+_BISHOP = (
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+)
+_ROOK = (
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+)
+_QUEEN = (
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+)
+# Король в миттельшпиле прячется за пешками, в эндшпиле идёт в центр
+_KING_MG = (
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+)
+_KING_EG = (
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+)
+
+PST_MG = (_PAWN_MG, _KNIGHT, _BISHOP, _ROOK, _QUEEN, _KING_MG)
+PST_EG = (_PAWN_EG, _KNIGHT, _BISHOP, _ROOK, _QUEEN, _KING_EG)
+
+
+# Сдвиг оценки эндшпиля в упакованном значении; суммы по доске далеко не достигают 2^19
+_PACK_SHIFT = 20
+_PACK_HALF = 1 << (_PACK_SHIFT - 1)
+
+
+def pack(mg: int, eg: int) -> int:
+    """Упаковывает пару (миттельшпиль, эндшпиль) в одно целое; суммы упакованных — тоже пары"""
+    return mg + (eg << _PACK_SHIFT)
+
+
+def unpack(value: int):
+    """Пара (миттельшпиль, эндшпиль) из упакованного значения"""
+    eg = (value + _PACK_HALF) >> _PACK_SHIFT
+    return value - (eg << _PACK_SHIFT), eg
+
+
+def _signed_table(values, tables):
+    # [цвет][тип][клетка] -> вклад фигуры с точки зрения белых
+    return tuple(
+        tuple(tuple(sign * (values[kind] + tables[kind][sq ^ mirror]) for sq in range(64))
+              for kind in range(6))
+        for sign, mirror in ((1, 0), (-1, 56))
+    )
+
+
+PSQ_MG = _signed_table(MG_VALUES, PST_MG)
+PSQ_EG = _signed_table(EG_VALUES, PST_EG)
+# То же в упакованном виде — его складывает Position
+PSQ = tuple(tuple(tuple(pack(mg, eg) for mg, eg in zip(PSQ_MG[color][kind], PSQ_EG[color][kind]))
+                  for kind in range(6))
+            for color in range(2))
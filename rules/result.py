@@ -0,0 +1,79 @@
+from typing import Optional, Tuple
+from .position import (Position, WHITE, BLACK, PAWN, KNIGHT, BISHOP, ROOK, QUEEN,
+                       popcount)
+
+# Исходы партии
+CHECKMATE = "checkmate"
+STALEMATE = "stalemate"
+FIFTY_MOVES = "fifty_moves"
+THREEFOLD_REPETITION = "threefold_repetition"
+FIVEFOLD_REPETITION = "fivefold_repetition"
+
+# Ничьи из-за недостатка материала
+KINGS_ONLY = "kings_only"
+LONE_KNIGHT = "lone_knight"
+LONE_BISHOP = "lone_bishop"
+SAME_COLOR_BISHOPS = "same_color_bishops"
+
+# Тёмные клетки доски (a8 — светлая)
+DARK_SQUARES = sum(1 << sq for sq in range(64) if ((sq & 7) + (sq >> 3)) % 2)
+
+
+def material_draw(position: Position) -> Optional[str]:
+    """Вид ничьей из-за недостатка материала или None, если мат ещё возможен"""
+    white, black = position.pieces[WHITE], position.pieces[BLACK]
+    for kind in (PAWN, ROOK, QUEEN):
+        if white[kind] | black[kind]:
+            return None
+
+    knights = popcount(white[KNIGHT] | black[KNIGHT])
+    bishops = white[BISHOP] | black[BISHOP]
+
+    if not knights and not bishops:
+        return KINGS_ONLY
+    if knights == 1 and not bishops:
+        return LONE_KNIGHT
+    if knights:
+        return None
+    if not bishops & (bishops - 1):
+        return LONE_BISHOP
+    # Все слоны на клетках одного цвета
+    if not bishops & DARK_SQUARES or bishops & DARK_SQUARES == bishops:
+        return SAME_COLOR_BISHOPS
+    return None
+
+
+def game_status(position: Position, repetitions: int = 1,
+                has_moves: Optional[bool] = None) -> Tuple[bool, Optional[str]]:
+    """
+    Статус позиции для стороны на ходу: (шах, исход или None)
+
+    :param position: Позиция
+    :param repetitions: Сколько раз позиция уже встречалась в партии
+    :param has_moves: Есть ли легальные ходы, если это уже известно вызывающему
+    """
+    in_check = position.in_check()
+
+    outcome = material_draw(position)
+    if outcome:
+        return (in_check, outcome)
+    if position.halfmove_clock >= 100:
+        return (in_check, FIFTY_MOVES)
+    if repetitions >= 5:
+        return (in_check, FIVEFOLD_REPETITION)
+    if repetitions >= 3:
+        return (in_check, THREEFOLD_REPETITION)
+    if has_moves is None:
+        has_moves = position.has_legal_moves()
+    if not has_moves:
+        return (in_check, CHECKMATE if in_check else STALEMATE)
+    return (in_check, None)
+
+
+def result_string(position: Position, outcome: Optional[str]) -> str:
+    """Результат партии в нотации PGN: 1-0, 0-1, 1/2-1/2 или *"""
+    if outcome is None:
+        return "*"
+    if outcome == CHECKMATE:
+        return "0-1" if position.side == WHITE else "1-0"
+    return "1/2-1/2"
@@ -0,0 +1,129 @@
+"""
+Стандартная алгебраическая нотация (SAN): запись и разбор ходов
+"""
+import re
+from typing import Optional, Sequence
+from .position import (Position, PAWN, KING, PIECE_LETTERS, CAPTURE, CASTLING,
+                       iter_bits, square_name)
+
+_SAN_RE = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([NBRQ]))?$")
+
+
+def move_to_san(position: Position, move: int,
+                legal_moves: Optional[Sequence[int]] = None) -> str:
+    """
+    Запись легального хода в SAN для позиции до хода
+
+    Уточнение по вертикали или горизонтали добавляется, только если на ту же
+    клетку может пойти другая фигура того же типа; в конце ставится «+» или «#».
+
+    :param legal_moves: Уже построенный список легальных ходов позиции —
+        при массовой записи он не генерируется заново для каждого хода
+    """
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    promotion = (move >> 12) & 7
+    flags = move >> 15
+    color, kind = position.board[from_sq]
+
+    if flags & CASTLING:
+        san = "O-O" if to_sq > from_sq else "O-O-O"
+    elif kind == PAWN:
+        san = square_name(from_sq)[0] + "x" if flags & CAPTURE else ""
+        san += square_name(to_sq)
+        if promotion:
+            san += "=" + PIECE_LETTERS[promotion]
+    else:
+        san = PIECE_LETTERS[kind]
+        # Уточнение нужно, только если фигур этого типа больше одной
+        if position.pieces[color][kind] & ~(1 << from_sq):
+            san += _disambiguation(position, move, kind, legal_moves)
+        if flags & CAPTURE:
+            san += "x"
+        san += square_name(to_sq)
+
+    # Шах берётся из кэша шахующих фигур; ходы соперника ищутся только под шахом
+    position.make_move(move)
+    if position.checkers():
+        san += "+" if position.has_legal_moves() else "#"
+    position.unmake_move()
+    return san
+
+
+def _disambiguation(position: Position, move: int, kind: int,
+                    legal_moves: Optional[Sequence[int]]) -> str:
+    from_sq = move & 63
+    to_sq = (move >> 6) & 63
+    board = position.board
+    if legal_moves is None:
+        legal_moves = _legal_moves_of_kind(position, kind)
+    rivals = [other & 63 for other in legal_moves
+              if (other >> 6) & 63 == to_sq and other & 63 != from_sq
+              and board[other & 63][1] == kind]
+    if not rivals:
+        return ""
+    name = square_name(from_sq)
+    if all(sq & 7 != from_sq & 7 for sq in rivals):
+        return name[0]
+    if all(sq >> 3 != from_sq >> 3 for sq in rivals):
+        return name[1]
+    return name
+
+
+def parse_san(position: Position, san: str,
+              legal_moves: Optional[Sequence[int]] = None) -> int:
+    """
+    Находит легальный ход по записи SAN
+
+    Допускаются суффиксы «+», «#», «!», «?» и рокировка через ноль (0-0).
+
+    :param legal_moves: Уже построенный список легальных ходов позиции
+
+    :raises ValueError: если запись некорректна, ход нелегален или неоднозначен
+    """
+    text = san.rstrip("+#!?")
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        kingside = len(text) == 3
+        if legal_moves is None:
+            legal_moves = _legal_moves_of_kind(position, KING)
+        for move in legal_moves:
+            if move >> 15 & CASTLING and (((move >> 6) & 63) > (move & 63)) == kingside:
+                return move
+        raise ValueError(f"Illegal move: {san!r}")
+
+    match = _SAN_RE.match(text)
+    if match is None:
+        raise ValueError(f"Invalid SAN: {san!r}")
+    letter, from_file, from_rank, _, target, promotion = match.groups()
+    kind = PIECE_LETTERS.index(letter) if letter else PAWN
+    to_sq = (8 - int(target[1])) * 8 + ord(target[0]) - ord("a")
+    promotion = PIECE_LETTERS.index(promotion) if promotion else 0
+    if legal_moves is None:
+        legal_moves = _legal_moves_of_kind(position, kind)
+
+    board = position.board
+    found = None
+    for move in legal_moves:
+        from_sq = move & 63
+        if ((move >> 6) & 63 != to_sq or board[from_sq][1] != kind
+                or (move >> 12) & 7 != promotion or move >> 15 & CASTLING):
+            continue
+        if from_file and from_sq & 7 != ord(from_file) - ord("a"):
+            continue
+        if from_rank and from_sq >> 3 != 8 - int(from_rank):
+            continue
+        if found is not None:
+            raise ValueError(f"Ambiguous move: {san!r}")
+        found = move
+    if found is None:
+        raise ValueError(f"Illegal move: {san!r}")
+    return found
+
+
+def _legal_moves_of_kind(position: Position, kind: int):
+    # Ходы только фигур нужного типа: дешевле полной генерации для одного хода
+    is_legal = position.is_legal
+    for sq in iter_bits(position.pieces[position.side][kind]):
+        for move in position.moves_from(sq, position.piece_targets(sq)):
+            if is_legal(move):
+                yield move
@@ -0,0 +1,405 @@
+"""
+Поиск лучшего хода: negamax с альфа-бета отсечением и итеративным углублением
+
+Использует собственный генератор ходов из rules.position. Поиск работает
+на копии позиции и может быть прерван по времени или через stop(), поэтому
+его можно запускать в отдельном потоке, не трогая позицию интерфейса.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+from .position import Position, PAWN, CAPTURE, EN_PASSANT, PROMOTION_PIECES, move_to_uci
+from .evaluation import PawnTable, evaluate
+from .transposition import TranspositionTable, DEFAULT_SIZE_MB, MOVE_MASK
+
+MATE = 100000
+MATE_BOUND = MATE - 1000  # Оценки выше — мат в пределах глубины поиска
+INFINITY = MATE + 1
+MAX_PLY = 64
+
+# Типы записей таблицы транспозиций
+EXACT = 0
+LOWER = 1  # Оценка не меньше записанной (было отсечение по beta)
+UPPER = 2  # Оценка не больше записанной (ни один ход не улучшил alpha)
+
+CHECK_EVERY = 1024  # Как часто (в узлах) проверять время и запрос остановки
+
+# Ценность фигур для MVV-LVA (король — самый «дорогой» нападающий)
+ORDER_VALUES = (1, 3, 3, 5, 9, 10)
+# Бонус превращения при упорядочивании ходов по типу новой фигуры (ферзь первым)
+PROMOTION_ORDER = tuple(ORDER_VALUES[kind] * 100 if kind in PROMOTION_PIECES else 0
+                        for kind in range(8))
+
+
+class SearchStopped(Exception):
+    """Поиск прерван по времени или через stop()"""
+
+
+class SearchResult:
+    def __init__(self, move: Optional[int], score: int, depth: int, nodes: int,
+                 elapsed: float, pv: List[int]):
+        """
+        Итог поиска (или очередной итерации углубления)
+
+        :param move: Лучший найденный ход или None, если ходов нет
+        :param score: Оценка в сантипешках с точки зрения стороны на ходу
+        :param depth: Последняя полностью просчитанная глубина
+        :param nodes: Число просмотренных узлов
+        :param elapsed: Время поиска в секундах
+        :param pv: Главный вариант
+        """
+        self.move = move
+        self.score = score
+        self.depth = depth
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.pv = pv
+
+    @property
+    def nps(self) -> int:
+        return int(self.nodes / self.elapsed) if self.elapsed > 0 else 0
+
+    def __repr__(self):
+        pv = " ".join(move_to_uci(move) for move in self.pv)
+        return (f"SearchResult(depth={self.depth}, score={self.score}, "
+                f"nodes={self.nodes}, nps={self.nps}, pv={pv})")
+
+
+class Searcher:
+    def __init__(self, tt_size_mb: float = DEFAULT_SIZE_MB):
+        """
+        Движок: итеративное углубление, альфа-бета, таблица транспозиций,
+        упорядочивание ходов (MVV-LVA, killer-ходы, history) и поиск взятий
+
+        Таблица транспозиций, пешечная таблица и history сохраняются между
+        вызовами search()
+
+        :param tt_size_mb: Объём таблицы транспозиций в мегабайтах
+        """
+        self.tt_size_mb = tt_size_mb
+        self.tt = TranspositionTable(tt_size_mb)
+        self.pawn_table = PawnTable()
+        self.history = [[0] * 4096, [0] * 4096]  # [цвет][from | to << 6]
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.nodes = 0
+        self._stop = threading.Event()
+        self._deadline = None
+        self._seen: Dict[int, int] = {}
+        self._root_moves = None
+
+    def stop(self):
+        """Просит идущий поиск завершиться как можно скорее (потокобезопасно)"""
+        self._stop.set()
+
+    def clear(self):
+        """Забывает таблицу транспозиций, пешечную таблицу и статистику упорядочивания"""
+        self.tt.clear()
+        self.pawn_table.clear()
+        self.history = [[0] * 4096, [0] * 4096]
+
+    def search(self, position: Position, time_limit: Optional[float] = 1.0,
+               max_depth: int = MAX_PLY - 1, game_history: Iterable[int] = (),
+               on_iteration: Optional[Callable[[SearchResult], None]] = None,
+               stop_event: Optional[threading.Event] = None,
+               root_moves: Optional[Iterable[int]] = None) -> SearchResult:
+        """
+        Ищет лучший ход для стороны на ходу
+
+        :param position: Позиция (не изменяется — поиск идёт на копии)
+        :param time_limit: Бюджет времени в секундах (None — без ограничения)
+        :param max_depth: Максимальная глубина итеративного углубления
+        :param game_history: Хеши позиций, уже встречавшихся в партии (для ничьей повторением)
+        :param on_iteration: Вызывается после каждой завершённой итерации
+        :param stop_event: Событие остановки, если его выставляет кто-то снаружи
+        :param root_moves: Рассматривать в корне только эти ходы (для разделения корня между процессами)
+        """
+        position = position.copy()
+        self._stop = stop_event or threading.Event()
+        start = time.perf_counter()
+        self._deadline = start + time_limit if time_limit is not None else None
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self._seen = {}
+        for key in game_history:
+            self._seen[key] = self._seen.get(key, 0) + 1
+        # Текущая позиция уже на доске — повтором в поиске она не считается
+        self._seen[position.hash] = 0
+        self.tt.new_search()
+
+        moves = list(position.generate_legal_moves())
+        if root_moves is not None:
+            root_moves = set(root_moves)
+            moves = [move for move in moves if move in root_moves]
+        self._root_moves = root_moves
+        if not moves:
+            score = -MATE if position.in_check() else 0
+            return SearchResult(None, score, 0, 0, 0.0, [])
+
+        result = SearchResult(moves[0], 0, 0, 0, 0.0, [moves[0]])
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(position, depth, -INFINITY, INFINITY, 0)
+            except SearchStopped:
+                break
+            pv = self._principal_variation(position, depth)
+            result = SearchResult(pv[0] if pv else result.move, score, depth, self.nodes,
+                                  time.perf_counter() - start, pv)
+            if on_iteration:
+                on_iteration(result)
+            # Единственный ход или найден мат — дальше углубляться незачем
+            if (len(moves) == 1 and root_moves is None) or abs(score) >= MATE_BOUND:
+                break
+            # Следующая итерация заведомо не успеет завершиться
+            if self._deadline is not None:
+                now = time.perf_counter()
+                if now + (now - start) > self._deadline:
+                    break
+        result.nodes = self.nodes
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    # === Поиск ===
+
+    def _check_stop(self):
+        if self._stop.is_set():
+            raise SearchStopped()
+        if self._deadline is not None and time.perf_counter() >= self._deadline:
+            raise SearchStopped()
+
+    def _negamax(self, position: Position, depth: int, alpha: int, beta: int, ply: int) -> int:
+        self.nodes += 1
+        if not self.nodes % CHECK_EVERY:
+            self._check_stop()
+
+        key = position.hash
+        if ply:
+            if position.halfmove_clock >= 100 or self._seen.get(key):
+                return 0
+            # Мат в более коротком варианте уже найден — дальше не ищем
+            alpha = max(alpha, -MATE + ply)
+            beta = min(beta, MATE - ply - 1)
+            if alpha >= beta:
+                return alpha
+
+        in_check = position.in_check()
+        if in_check:
+            depth += 1
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self._quiescence(position, alpha, beta, ply)
+
+        tt_move = 0
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_flag, tt_score, tt_move = entry
+            if ply and tt_depth >= depth:
+                tt_score = _score_from_tt(tt_score, ply)
+                if (tt_flag == EXACT or (tt_flag == LOWER and tt_score >= beta)
+                        or (tt_flag == UPPER and tt_score <= alpha)):
+                    return tt_score
+
+        moves = list(position.generate_legal_moves())
+        if not ply and self._root_moves is not None:
+            moves = [move for move in moves if move in self._root_moves]
+        if not moves:
+            return -MATE + ply if in_check else 0
+        moves.sort(key=self._order_key(position, tt_move, ply), reverse=True)
+
+        side = position.side
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = moves[0]
+        seen = self._seen
+        for move in moves:
+            position.make_move(move)
+            seen[key] = seen.get(key, 0) + 1
+            try:
+                score = -self._negamax(position, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                seen[key] -= 1
+                position.unmake_move()
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        if not move >> 15 & CAPTURE:
+                            self._remember_quiet(side, move, depth, ply)
+                        break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, flag, _score_to_tt(best_score, ply), best_move)
+        return best_score
+
+    def _quiescence(self, position: Position, alpha: int, beta: int, ply: int) -> int:
+        """Досчитывает взятия и превращения, чтобы не оценивать позицию посреди размена"""
+        self.nodes += 1
+        if not self.nodes % CHECK_EVERY:
+            self._check_stop()
+
+        stand_pat = evaluate(position, self.pawn_table)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        if ply >= MAX_PLY - 1:
+            return alpha
+
+        is_legal = position.is_legal
+        moves = [move for move in position.generate_moves()
+                 if (move >> 15 & CAPTURE or (move >> 12) & 7) and is_legal(move)]
+        moves.sort(key=self._capture_key(position), reverse=True)
+        for move in moves:
+            position.make_move(move)
+            try:
+                score = -self._quiescence(position, -beta, -alpha, ply + 1)
+            finally:
+                position.unmake_move()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    # === Упорядочивание ходов ===
+
+    def _capture_key(self, position: Position):
+        board = position.board
+
+        def key(move: int) -> int:
+            score = PROMOTION_ORDER[(move >> 12) & 7]
+            if move >> 15 & CAPTURE:
+                # MVV-LVA: сначала самая ценная жертва, затем самый дешёвый нападающий
+                victim = PAWN if move >> 15 & EN_PASSANT else board[(move >> 6) & 63][1]
+                attacker = board[move & 63][1]
+                score += 1000 + ORDER_VALUES[victim] * 10 - ORDER_VALUES[attacker]
+            return score
+
+        return key
+
+    def _order_key(self, position: Position, tt_move: int, ply: int):
+        capture_key = self._capture_key(position)
+        killer1, killer2 = self.killers[ply]
+        history = self.history[position.side]
+
+        def key(move: int) -> int:
+            # В таблице ход хранится без флагов
+            if move & MOVE_MASK == tt_move:
+                return 1 << 30
+            if move >> 15 & CAPTURE or (move >> 12) & 7:
+                return (1 << 29) + capture_key(move)
+            if move == killer1:
+                return (1 << 28) + 1
+            if move == killer2:
+                return 1 << 28
+            return history[move & 4095]
+
+        return key
+
+    def _remember_quiet(self, side: int, move: int, depth: int, ply: int):
+        """Тихий ход, давший отсечение: в killer-ходы этого уровня и в history"""
+        killers = self.killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        history = self.history[side]
+        history[move & 4095] += depth * depth
+        # Не даём history перерасти приоритет killer-ходов
+        if history[move & 4095] >= 1 << 27:
+            self.history[side] = [value >> 1 for value in history]
+
+    def _principal_variation(self, position: Position, depth: int) -> List[int]:
+        """Главный вариант по лучшим ходам из таблицы транспозиций"""
+        pv = []
+        visited = set()
+        for _ in range(depth):
+            entry = self.tt.probe(position.hash)
+            if entry is None or position.hash in visited:
+                break
+            move = next((move for move in position.generate_legal_moves()
+                         if move & MOVE_MASK == entry[3]), None)
+            if move is None:
+                break
+            visited.add(position.hash)
+            pv.append(move)
+            position.make_move(move)
+        for _ in pv:
+            position.unmake_move()
+        return pv
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # Оценки мата храним относительно узла, а не корня
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchThread:
+    def __init__(self, searcher: Optional[Searcher] = None):
+        """
+        Фоновый поиск: позволяет игровому циклу не ждать, пока движок думает
+
+        Результат забирается опросом через poll() из основного потока
+        """
+        self.searcher = searcher or Searcher()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._result: Optional[SearchResult] = None
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self) -> bool:
+        return self._thread is not None
+
+    def start(self, position: Position, time_limit: Optional[float] = 1.0,
+              game_history: Iterable[int] = (), max_depth: int = MAX_PLY - 1):
+        """Запускает поиск в фоне; позиция копируется сразу, её можно менять дальше"""
+        self.cancel()
+        position = position.copy()
+        game_history = list(game_history)
+
+        # Своё событие на каждый поиск: остановка не «протекает» в следующий
+        stop = self._stop = threading.Event()
+
+        def run():
+            result = self.searcher.search(position, time_limit, max_depth, game_history,
+                                          stop_event=stop)
+            with self._lock:
+                self._result = result
+
+        self._result = None
+        self._thread = threading.Thread(target=run, name="search", daemon=True)
+        self._thread.start()
+
+    def poll(self) -> Optional[SearchResult]:
+        """Результат завершённого поиска (один раз) или None, если поиск ещё идёт"""
+        if self._thread is None or self._thread.is_alive():
+            return None
+        self._thread = None
+        with self._lock:
+            result, self._result = self._result, None
+        return result
+
+    def cancel(self):
+        """Прерывает поиск и отбрасывает его результат"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._result = None
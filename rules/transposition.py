@@ -0,0 +1,115 @@
+"""
+Таблица транспозиций фиксированного размера
+
+Записи лежат в одном заранее выделенном массиве array("Q"), поэтому
+память задаётся в мегабайтах при создании и дальше не растёт, сколько бы
+позиций ни просмотрел поиск. Каждая запись — одно 64-битное слово:
+
+    биты  0–14  ход без флагов: откуда, куда и превращение (MOVE_MASK)
+    биты 15–32  оценка со сдвигом SCORE_OFFSET
+    биты 33–39  глубина
+    биты 40–41  тип оценки (EXACT, LOWER, UPPER)
+    биты 42–45  возраст — номер поиска, в котором сделана запись
+    биты 46–63  старшие 18 бит хеша для проверки, та ли это позиция
+
+Флаги хода однозначно следуют из позиции, поэтому не хранятся: ход из
+таблицы сравнивается со сгенерированными как move & MOVE_MASK.
+
+Записи сгруппированы в корзины по две: первая заменяется, только если новая
+запись глубже или старая осталась от прошлых поисков, во вторую пишется всё
+остальное.
+"""
+from array import array
+from typing import Optional, Tuple
+
+DEFAULT_SIZE_MB = 16
+
+ENTRY_BYTES = 8
+BUCKET_SIZE = 2
+
+_MOVE_BITS = 15
+_SCORE_SHIFT = 15
+_SCORE_BITS = 18
+_DEPTH_SHIFT = 33
+_FLAG_SHIFT = 40
+_AGE_SHIFT = 42
+_CHECK_SHIFT = 46
+
+SCORE_OFFSET = 1 << (_SCORE_BITS - 1)  # Оценки от -2^17 до 2^17, мат — 100000
+MAX_DEPTH = 127
+AGE_CYCLE = 16
+
+MOVE_MASK = (1 << _MOVE_BITS) - 1
+_SCORE_MASK = (1 << _SCORE_BITS) - 1
+
+
+class TranspositionTable:
+    def __init__(self, size_mb: float = DEFAULT_SIZE_MB):
+        """
+        :param size_mb: Объём таблицы в мегабайтах; число корзин округляется
+            вниз до степени двойки, чтобы индекс брался маской хеша
+        """
+        entries = max(BUCKET_SIZE, int(size_mb * (1 << 20)) // ENTRY_BYTES)
+        buckets = 1 << ((entries // BUCKET_SIZE).bit_length() - 1)
+        self.mask = buckets - 1
+        self.age = 0
+        self.table = array("Q", bytes(buckets * BUCKET_SIZE * ENTRY_BYTES))
+
+    @property
+    def size_mb(self) -> float:
+        return len(self.table) * ENTRY_BYTES / (1 << 20)
+
+    def __len__(self) -> int:
+        """Число мест для записей"""
+        return len(self.table)
+
+    def clear(self):
+        """Стирает все записи"""
+        self.table = array("Q", bytes(len(self.table) * ENTRY_BYTES))
+        self.age = 0
+
+    def new_search(self):
+        """
+        Начало нового поиска: записи прошлых поисков остаются доступными,
+        но первыми уступают место новым
+        """
+        self.age = (self.age + 1) % AGE_CYCLE
+
+    def probe(self, key: int) -> Optional[Tuple[int, int, int, int]]:
+        """Запись позиции: (глубина, тип оценки, оценка, ход без флагов) или None"""
+        index = (key & self.mask) * BUCKET_SIZE
+        check = key >> _CHECK_SHIFT
+        table = self.table
+        for slot in (index, index + 1):
+            entry = table[slot]
+            if entry and entry >> _CHECK_SHIFT == check:
+                return ((entry >> _DEPTH_SHIFT) & MAX_DEPTH,
+                        (entry >> _FLAG_SHIFT) & 3,
+                        ((entry >> _SCORE_SHIFT) & _SCORE_MASK) - SCORE_OFFSET,
+                        entry & MOVE_MASK)
+        return None
+
+    def store(self, key: int, depth: int, flag: int, score: int, move: int):
+        """Записывает результат поиска позиции (от хода остаётся move & MOVE_MASK)"""
+        index = (key & self.mask) * BUCKET_SIZE
+        check = key >> _CHECK_SHIFT
+        depth = min(depth, MAX_DEPTH)
+        entry = ((move & MOVE_MASK) | (score + SCORE_OFFSET) << _SCORE_SHIFT | depth << _DEPTH_SHIFT
+                 | flag << _FLAG_SHIFT | self.age << _AGE_SHIFT | check << _CHECK_SHIFT)
+        table = self.table
+        first = table[index]
+        # Первое место — для самых глубоких записей текущего поиска,
+        # второе заменяется всегда
+        if (not first or first >> _CHECK_SHIFT == check
+                or (first >> _AGE_SHIFT) & (AGE_CYCLE - 1) != self.age
+                or depth >= (first >> _DEPTH_SHIFT) & MAX_DEPTH):
+            table[index] = entry
+        else:
+            table[index + 1] = entry
+
+    def hashfull(self, sample: int = 1000) -> int:
+        """Заполненность в промилле по первым sample местам (только записи текущего поиска)"""
+        sample = min(sample, len(self.table))
+        used = sum(1 for entry in self.table[:sample]
+                   if entry and (entry >> _AGE_SHIFT) & (AGE_CYCLE - 1) == self.age)
+        return used * 1000 // sample if sample else 0
@@ -0,0 +1,26 @@
+import random
+
+# Случайные 64-битные ключи Zobrist. Генератор с фиксированным зерном,
+# чтобы хеши позиций совпадали между запусками и процессами
+_rng = random.Random(20240601)
+
+# PIECE_KEYS[цвет][тип][клетка]
+PIECE_KEYS = [[[_rng.getrandbits(64) for _ in range(64)] for _ in range(6)]
+              for _ in range(2)]
+
+# Ключ добавляется, когда ходят чёрные
+SIDE_KEY = _rng.getrandbits(64)
+
+_CASTLING_RIGHT_KEYS = [_rng.getrandbits(64) for _ in range(4)]
+
+# CASTLING_KEYS[маска прав] — XOR ключей всех установленных прав
+CASTLING_KEYS = []
+for _rights in range(16):
+    _key = 0
+    for _bit in range(4):
+        if _rights >> _bit & 1:
+            _key ^= _CASTLING_RIGHT_KEYS[_bit]
+    CASTLING_KEYS.append(_key)
+
+# Вертикаль, на которой возможно взятие на проходе
+EP_FILE_KEYS = [_rng.getrandbits(64) for _ in range(8)]
@@ -0,0 +1,54 @@
+import os
+from typing import Dict, Optional
+import pygame
+from constants import TILE_SIZE
+
+# Общий для всего процесса атлас спрайтов: путь -> готовая поверхность
+_atlas: Dict[str, Optional[pygame.Surface]] = {}
+
+
+def _resolve_path(path: str) -> Optional[str]:
+    """Ищет файл без учёта регистра имени (assets/bP.png -> assets/bp.png)"""
+    candidates = [path, os.path.join(os.path.dirname(os.path.abspath(__file__)), path)]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            return candidate
+        directory, name = os.path.split(candidate)
+        if os.path.isdir(directory):
+            for entry in os.listdir(directory):
+                if entry.lower() == name.lower():
+                    return os.path.join(directory, entry)
+    return None
+
+
+def get_sprite(path: str) -> Optional[pygame.Surface]:
+    """
+    Возвращает спрайт фигуры из атласа
+
+    Файл читается с диска, масштабируется до TILE_SIZE и переводится
+    в формат дисплея только при первом обращении
+    """
+    if path in _atlas:
+        return _atlas[path]
+
+    sprite = None
+    resolved = _resolve_path(path)
+    try:
+        if resolved is None:
+            raise FileNotFoundError(f"No file '{path}' found")
+        sprite = pygame.image.load(resolved)
+        sprite = pygame.transform.scale(sprite, (TILE_SIZE, TILE_SIZE))
+        # convert_alpha возможен только после создания окна
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+    except Exception as e:
+        print(f"Error loading sprite: {e}")
+        sprite = None
+
+    _atlas[path] = sprite
+    return sprite
+
+
+def clear_atlas():
+    """Сбрасывает атлас (например, после смены TILE_SIZE или дисплея)"""
+    _atlas.clear()
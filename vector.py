@@ -1,4 +1,6 @@
 class Vector2i:
+    __slots__ = ("x", "y")
+
     def __init__(self, x=0, y=0):
         self.x = int(x)
         self.y = int(y) if y is not None else int(x)